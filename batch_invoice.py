@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from invoice import BILLINGS_FOLDER, invoice_from_dict
+from invoice_pdf import build_invoice_pdf
+
+# --- Batch Invoicing ---
+# Orders are read one JSON object per line:
+#   {"order_no": "B2B-0001", "billed_to": "Acme Traders", "date": "31 May 2025",
+#    "lines": [{"name": "Steel Bolt", "qty": 10, "price": 12.5, "gst_rate": 0.18}]}
+# "order_no" defaults to the line number and "date" to today.
+
+def read_orders(path):
+    with open(path, "r") as file:
+        for line_no, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                order = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path}:{line_no}: {e}") from None
+            order.setdefault("order_no", f"BATCH{line_no:06d}")
+            yield order
+
+def render_order(order, out_dir):
+    invoice = invoice_from_dict(order)
+    filename = os.path.join(out_dir, f"{invoice.order_no}.pdf")
+    build_invoice_pdf(invoice, filename)
+    return filename
+
+def render_batch(orders, out_dir, workers=None, max_in_flight=None, report=None):
+    """Render orders across a process pool, keeping at most max_in_flight submitted at once.
+
+    Returns (rendered, failures) where failures is a list of (order_no, error message).
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 4
+    rendered = 0
+    failures = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+        for order in orders:
+            if len(in_flight) >= max_in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                rendered += _collect(done, in_flight, failures)
+                if report is not None:
+                    report(rendered, len(failures))
+            in_flight[pool.submit(render_order, order, out_dir)] = order["order_no"]
+        done, _ = wait(in_flight)
+        rendered += _collect(done, in_flight, failures)
+    return rendered, failures
+
+def _collect(done, in_flight, failures):
+    rendered = 0
+    for future in done:
+        order_no = in_flight.pop(future)
+        try:
+            future.result()
+            rendered += 1
+        except Exception as e:
+            failures.append((order_no, str(e)))
+    return rendered
+
+# --- Entry Point ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render invoices in bulk from a JSONL file of orders.")
+    parser.add_argument("orders", help="JSONL file with one order per line")
+    parser.add_argument("-o", "--out", default=BILLINGS_FOLDER, help="output folder (default: %(default)s)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.out, exist_ok=True)
+    started = time.perf_counter()
+
+    next_report = [500]
+
+    def report(rendered, failed):
+        if rendered >= next_report[0]:
+            next_report[0] += 500
+            elapsed = time.perf_counter() - started
+            print(f"{rendered} invoices ({rendered / elapsed:.1f}/s), {failed} failed", file=sys.stderr)
+
+    rendered, failures = render_batch(read_orders(args.orders), args.out, args.workers, report=report)
+    elapsed = time.perf_counter() - started
+    for order_no, error in failures:
+        print(f"{order_no}: {error}", file=sys.stderr)
+    rate = rendered / elapsed if elapsed else 0.0
+    print(f"Rendered {rendered} invoices in {elapsed:.2f}s ({rate:.1f} invoices/sec), {len(failures)} failed")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
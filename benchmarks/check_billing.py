@@ -0,0 +1,115 @@
+"""Pins the bill arithmetic and the ledger rollups against hand-worked figures.
+
+Run from the repository root:  python benchmarks/check_billing.py
+
+Checks Cart.totals() (paise, per-slab freight and GST, half-up rounding) for mixed slabs, line
+removal and the 0% slab, and that InvoiceLedger.rebuild_rollups() reproduces the rollups
+record() kept incrementally. Exits with status 1 if anything differs.
+"""
+import os
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cart import Cart, CartLine, CartTotals, SlabTotals, apply_rate, to_paise
+from invoice_ledger import ROLLUPS, InvoiceLedger
+
+failures = []
+
+def check(label, actual, expected):
+    if actual != expected:
+        failures.append(f"{label}:\n  expected {expected!r}\n  got      {actual!r}")
+
+def slab(rate, net, freight, gst):
+    return SlabTotals(Decimal(rate), net, freight, gst)
+
+def mixed_lines():
+    return [
+        CartLine(1, "Steel bolt", "SB1", 3, "99.99", "0.18"),    # net 29997
+        CartLine(2, "Washer", "W1", 1, "10.005", "0.18"),        # 10.005 rupees -> 1001 paise (half-up)
+        CartLine(3, "Copper pipe", "CP1", 2, "250.50", "0"),     # net 50100, no GST
+        CartLine(4, "Nut", "N1", 7, "1.15", "0.28"),             # net 805
+    ]
+
+# --- Rounding ---
+def check_rounding():
+    check("to_paise half-up", [to_paise("0.125"), to_paise("0.124"), to_paise(10.005)], [13, 12, 1001])
+    check("apply_rate half-up", [apply_rate(100, "0.025"), apply_rate(20, "0.025"), apply_rate(1, "0.5")], [3, 1, 1])
+
+# --- Cart Totals ---
+def check_cart():
+    cart = Cart(mixed_lines())
+    # 0%:  freight 50100 * 2.5% = 1252.5 -> 1253, GST 0
+    # 18%: net 30998, freight 774.95 -> 775, GST (30998 + 775) * 18% = 5719.14 -> 5719
+    # 28%: net 805, freight 20.125 -> 20, GST (805 + 20) * 28% = 231
+    check("mixed slabs", cart.totals(), CartTotals(
+        81903, 2048, (slab("0", 50100, 1253, 0), slab("0.18", 30998, 775, 5719), slab("0.28", 805, 20, 231)),
+        5950, 89901))
+
+    cart.remove(0)
+    # 18% now holds only the washer: net 1001, freight 25.025 -> 25, GST 1026 * 18% = 184.68 -> 185
+    check("after removing a line", cart.totals(), CartTotals(
+        51906, 1298, (slab("0", 50100, 1253, 0), slab("0.18", 1001, 25, 185), slab("0.28", 805, 20, 231)),
+        416, 53620))
+
+    cart.remove(0)
+    check("after emptying a slab", [s.rate for s in cart.totals().slabs], [Decimal("0"), Decimal("0.28")])
+    cart.add(mixed_lines()[0])
+    check("re-adding matches a fresh cart", cart.totals(),
+          Cart([mixed_lines()[2], mixed_lines()[3], mixed_lines()[0]]).totals())
+
+    zero = Cart([mixed_lines()[2]])
+    check("0% slab only", zero.totals(), CartTotals(50100, 1253, (slab("0", 50100, 1253, 0),), 0, 51353))
+    check("empty cart", Cart().totals(), CartTotals(0, 0, (), 0, 0))
+    zero.clear()
+    check("cleared cart", zero.totals(), CartTotals(0, 0, (), 0, 0))
+
+# --- Ledger Rollups ---
+def rollup_rows(ledger):
+    rows = {}
+    with ledger._lock:
+        for table, (keys, values) in ROLLUPS.items():
+            if table == "product_rollup":
+                query = ("SELECT grain, period, p.material_code, p.name, qty, net, total FROM product_rollup"
+                         " JOIN rollup_products p ON p.id = product")
+            else:
+                query = f"SELECT grain, period, {', '.join(keys + values)} FROM {table}"
+            rows[table] = sorted(ledger._conn.execute(query).fetchall())
+    return rows
+
+def check_rollups():
+    with tempfile.TemporaryDirectory(prefix="globizz-check-") as directory:
+        ledger = InvoiceLedger(os.path.join(directory, "ledger.db"))
+        try:
+            carts = [Cart(mixed_lines()), Cart(mixed_lines()[1:3]), Cart([mixed_lines()[3]])]
+            # Bills across a month boundary, two of them on the same day.
+            days = [(2025, 1, 30), (2025, 1, 31), (2025, 1, 31), (2025, 2, 1), (2025, 2, 14)]
+            gross = {}
+            for i, (year, month, day) in enumerate(days):
+                cart = carts[i % len(carts)]
+                ledger.record(f"Customer {i}", cart, time.localtime(time.mktime((year, month, day, 12, 0, 0, 0, 0, -1))))
+                key = f"{year}-{month:02d}"
+                gross[key] = gross.get(key, 0) + cart.totals().gross_total
+
+            incremental = rollup_rows(ledger)
+            months = {period: row[-1] for grain, period, *row in incremental["sales_rollup"] if grain == "month"}
+            check("monthly gross matches the bills", months, gross)
+            ledger.rebuild_rollups()
+            check("rebuild_rollups reproduces record()", rollup_rows(ledger), incremental)
+        finally:
+            ledger.close()
+
+def main():
+    check_rounding()
+    check_cart()
+    check_rollups()
+    for failure in failures:
+        print(failure)
+    print("FAILED" if failures else "All billing checks passed")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
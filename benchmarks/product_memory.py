@@ -0,0 +1,54 @@
+"""Memory used by a synthetic catalogue held as plain dicts versus Product objects.
+
+Run from the repository root:  python benchmarks/product_memory.py [--skus 500000]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Product
+
+WORDS = ("steel", "bolt", "nut", "washer", "pipe", "copper", "valve", "flange",
+         "elbow", "socket", "gasket", "hose", "clamp", "bearing", "motor", "pump")
+
+def synthetic_rows(count, seed=7):
+    rng = random.Random(seed)
+    for i in range(count):
+        name = " ".join(rng.choice(WORDS) for _ in range(3)) + f" {i}"
+        yield i + 1, name, round(rng.uniform(1, 5000), 2), f"MC{i:07d}"
+
+def measure(build, count):
+    rows = list(synthetic_rows(count))  # allocated before tracing starts
+    gc.collect()
+    tracemalloc.start()
+    catalogue = build(rows)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del catalogue
+    return current
+
+def as_dicts(rows):
+    return [{"id": i, "name": name, "price": price, "material_code": code} for i, name, price, code in rows]
+
+def as_products(rows):
+    return [Product(i, name, price, code) for i, name, price, code in rows]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--skus", type=int, default=500_000)
+    args = parser.parse_args(argv)
+
+    dict_bytes = measure(as_dicts, args.skus)
+    product_bytes = measure(as_products, args.skus)
+    print(f"{args.skus} SKUs (container and records; the name/code strings are shared by both)")
+    print(f"  dict     {dict_bytes / 2**20:8.1f} MiB  {dict_bytes / args.skus:6.0f} B/SKU")
+    print(f"  Product  {product_bytes / 2**20:8.1f} MiB  {product_bytes / args.skus:6.0f} B/SKU")
+    print(f"  saved    {(1 - product_bytes / dict_bytes) * 100:7.1f} %")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+"""Benchmarks for the inventory, branch sync, table population, invoice and report hot paths.
+
+Run from the repository root:
+    python benchmarks/run_benchmarks.py [--sizes 1000 10000 100000] [--cart-lines 10 100 1000]
+                                        [--out results.json] [--baseline benchmarks/baseline.json]
+                                        [--save-baseline] [--threshold 0.25] [--only inventory/]
+
+Qt cases run on the offscreen platform and are reported as skipped when PyQt5 is not installed.
+With --baseline, any case whose median is more than --threshold slower than the baseline is
+flagged and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cart import Cart, CartLine
+from inventory_store import InventoryRepository, JsonInventoryStore, SqliteInventoryStore, migrate_json_inventory
+from invoice import invoice_from_cart
+from invoice_ledger import InvoiceLedger
+from product_lookup import ProductIndex
+from product_memory import synthetic_rows
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_CART_LINES = (10, 100, 1_000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+NOISE_FLOOR_MS = 0.05  # differences below this are never reported as regressions
+
+# --- Timing ---
+def measure(run, setup=None, min_runs=3, max_runs=20, budget=1.0):
+    """Time run() until budget seconds are spent (within min_runs..max_runs); setup() is not timed."""
+    samples = []
+    spent = 0.0
+    while len(samples) < min_runs or (spent < budget and len(samples) < max_runs):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        samples.append(elapsed * 1000)
+        spent += elapsed
+    return {"median_ms": statistics.median(samples), "min_ms": min(samples), "runs": len(samples)}
+
+def per_op(results, count):
+    return {key: value / count if key.endswith("_ms") else value for key, value in results.items()}
+
+# --- Fixtures ---
+def write_catalogue(directory, size):
+    """inventory.json snapshot plus a SQLite copy of the same synthetic catalogue."""
+    json_path = os.path.join(directory, f"inventory-{size}.json")
+    products = [{"id": i, "name": name, "price": price, "material_code": code}
+                for i, name, price, code in synthetic_rows(size)]
+    with open(json_path, "w") as file:
+        json.dump({"version": 0, "next_id": size + 1, "products": products}, file)
+    db_path = os.path.join(directory, f"inventory-{size}.db")
+    store = SqliteInventoryStore(db_path)
+    migrate_json_inventory(json_path, store)
+    store.close()
+    return json_path, db_path
+
+def make_cart(lines, first=0):
+    return Cart(CartLine(i, f"Synthetic product {i}", f"MC{i:07d}", i % 7 + 1, f"{10 + i % 500}.25",
+                         ("0.05", "0.12", "0.18", "0.28")[i % 4])
+                for i in range(first, first + lines))
+
+# --- Cases ---
+def bench_inventory(directory, size, results):
+    json_path, db_path = write_catalogue(directory, size)
+    for backend, open_store in (("json", JsonInventoryStore), ("sqlite", SqliteInventoryStore)):
+        def load():
+            store = open_store(json_path if backend == "json" else db_path)
+            store.all()
+            store.close()
+        results[f"inventory/{backend}_load/{size}"] = measure(load)
+
+        ops = 50
+        store = open_store(json_path if backend == "json" else db_path)
+        repository = InventoryRepository(store)
+        repository.products()
+        added = []
+        def add():
+            for i in range(ops):
+                added.append(repository.add(f"Bench product {i}", 12.5, f"BENCH{len(added):07d}"))
+        def update():
+            for product in added[-ops:]:
+                repository.update(product.id, product.name + " v2", product.price + 1, product.material_code)
+        def delete():
+            for _ in range(ops):
+                repository.delete(added.pop().id)
+        results[f"inventory/{backend}_add/{size}"] = per_op(measure(add, max_runs=5), ops)
+        results[f"inventory/{backend}_update/{size}"] = per_op(measure(update, max_runs=5), ops)
+        results[f"inventory/{backend}_delete/{size}"] = per_op(measure(delete, setup=add, max_runs=5), ops)
+        store.close()
+
+    products = SqliteInventoryStore(db_path).all()
+    index = ProductIndex()
+    results[f"lookup/index_rebuild/{size}"] = measure(lambda: index.rebuild(products))
+    queries = ("steel", "bolt nut", "MC00001", "vlave", "copper pipe 12")
+    results[f"lookup/search/{size}"] = per_op(
+        measure(lambda: [index.search(query) for query in queries]), len(queries))
+    return json_path, db_path
+
+def bench_sync(directory, size, db_path, results, changes=50):
+    """Exporting and applying a delta of `changes` edited products; should not grow with size."""
+    from inventory_sync import apply_delta, export_delta
+    source = SqliteInventoryStore(db_path)
+    branch = SqliteInventoryStore(os.path.join(directory, f"branch-{size}.db"))
+    apply_delta(branch, export_delta(source, directory, since=0)[0])
+    edited = source.all()[:changes]
+    def edit():
+        for i, product in enumerate(edited):
+            edited[i] = source.update(product.id, product.name, product.price + 1, product.material_code)
+    deltas = []
+    def edit_and_export():
+        edit()
+        deltas.append(export_delta(source, directory)[0])
+    results[f"sync/export_delta/{size}"] = measure(lambda: deltas.append(export_delta(source, directory)[0]),
+                                                   setup=edit)
+    for path in deltas:  # catch the branch up before timing the apply
+        apply_delta(branch, path)
+    results[f"sync/apply_delta/{size}"] = measure(lambda: apply_delta(branch, deltas[-1]), setup=edit_and_export)
+    source.close()
+    branch.close()
+
+def bench_invoice(directory, lines, results):
+    from invoice_pdf import build_invoice_pdf
+    cart = make_cart(lines)
+    results[f"cart/build_and_total/{lines}"] = measure(lambda: make_cart(lines).totals())
+    ledger = InvoiceLedger(os.path.join(directory, "ledger.db"))
+    results[f"ledger/record/{lines}"] = measure(lambda: ledger.record("Bench Customer", cart))
+    invoice = invoice_from_cart("ORD00000001", "Bench Customer", "01 January 2025", cart)
+    filename = os.path.join(directory, f"render-{lines}.pdf")
+    results[f"invoice/render/{lines}"] = measure(lambda: build_invoice_pdf(invoice, filename))
+    for engine in ("platypus", "canvas"):
+        results[f"invoice/render_{engine}/{lines}"] = measure(lambda: build_invoice_pdf(invoice, filename, engine=engine))
+    ledger.close()
+
+def bench_reports(directory, results, bills_per_day=20, catalogue=2000):
+    """Every report over a year of bills, for the whole year and for a range cut mid-month."""
+    from reports import REPORTS, run_report
+    ledger = InvoiceLedger(os.path.join(directory, "reports.db"))
+    start = time.mktime((2025, 1, 1, 12, 0, 0, 0, 0, -1))
+    for day in range(365):
+        when = time.localtime(start + day * 86400)
+        for bill in range(bills_per_day):
+            ledger.record("Bench Customer", make_cart(8, (day * bills_per_day + bill) * 8 % catalogue), when)
+    for name in REPORTS:
+        results[f"reports/{name}/year"] = measure(lambda: run_report(ledger, name, "2025-01-01", "2025-12-31"))
+        results[f"reports/{name}/mid_month"] = measure(
+            lambda: run_report(ledger, name, "2025-01-17", "2025-12-12"))
+    ledger.close()
+
+def load_qt():
+    try:
+        from PyQt5.QtWidgets import QApplication
+    except ImportError:
+        return None
+    return QApplication.instance() or QApplication(["benchmarks"])
+
+def bench_qt(app, directory, catalogues, cart_sizes, results):
+    import billing_app
+
+    billing_app.BILLINGS_FOLDER = os.path.join(directory, "billings")
+    billing_app._ledger = InvoiceLedger(os.path.join(directory, "qt-ledger.db"))
+    for size, (_, db_path) in catalogues.items():
+        billing_app._inventory = InventoryRepository(SqliteInventoryStore(db_path))
+        main_app = billing_app.MainApp()
+        main_app.show()  # the inventory tab is current, so its table really lays out and paints
+        main_app.build_billing_tab()
+        inventory_tab, billing_tab = main_app.inventory_tab, main_app.billing_tab
+        # Connected without a receiver object, so these run directly on the render thread.
+        settled = []
+        main_app.invoice_queue.finished.connect(lambda *_: settled.append(True))
+        main_app.invoice_queue.failed.connect(lambda *_: settled.append(False))
+
+        def populate():
+            inventory_tab.load_inventory()
+            app.processEvents()
+            inventory_tab.table.viewport().repaint()
+        results[f"qt/inventory_table/{size}"] = measure(populate)
+        results[f"qt/billing_update_products/{size}"] = measure(billing_tab.update_products)
+
+        for lines in cart_sizes:
+            def fill():
+                billing_tab.cart = make_cart(lines)
+                billing_tab.name_input.setText("Bench Customer")
+            def generate():
+                waiting_for = len(settled) + 1
+                billing_tab.generate_pdf()
+                # Until the PDF is on disk, not just queued.
+                while len(settled) < waiting_for:
+                    app.processEvents()
+                    time.sleep(0.001)
+            results[f"qt/generate_pdf/{size}/{lines}"] = measure(generate, setup=fill, max_runs=5)
+        main_app.invoice_queue.shutdown(wait=True)
+        main_app.deleteLater()
+        app.processEvents()
+        billing_app._inventory.store.close()
+    billing_app._ledger.close()
+
+# --- Baseline ---
+def compare(results, baseline, threshold):
+    """[(name, baseline_ms, current_ms, ratio)] for cases that got slower than the threshold allows."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        before, after = previous["median_ms"], current["median_ms"]
+        if after - before > NOISE_FLOOR_MS and after > before * (1 + threshold):
+            regressions.append((name, before, after, after / before))
+    return regressions
+
+def environment():
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "machine": platform.machine(), "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+# --- Entry Point ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="catalogue sizes")
+    parser.add_argument("--cart-lines", type=int, nargs="+", default=DEFAULT_CART_LINES, help="cart sizes")
+    parser.add_argument("--only", help="run only cases whose name starts with this prefix")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    def wanted(group):
+        return not args.only or args.only.startswith(group) or group.startswith(args.only)
+
+    results = {}
+    skipped = []
+    with tempfile.TemporaryDirectory(prefix="globizz-bench-") as directory:
+        catalogues = {}
+        for size in args.sizes:
+            if wanted("inventory/") or wanted("lookup/") or wanted("qt/"):
+                catalogues[size] = bench_inventory(directory, size, results)
+            if wanted("sync/"):
+                db_path = catalogues[size][1] if size in catalogues else write_catalogue(directory, size)[1]
+                bench_sync(directory, size, db_path, results)
+        if wanted("cart/") or wanted("ledger/") or wanted("invoice/"):
+            for lines in args.cart_lines:
+                bench_invoice(directory, lines, results)
+        if wanted("reports/"):
+            bench_reports(directory, results)
+        if wanted("qt/"):
+            app = load_qt()
+            if app is None:
+                skipped.append("qt/* (PyQt5 is not installed)")
+            else:
+                bench_qt(app, directory, catalogues, args.cart_lines, results)
+    if args.only:
+        results = {name: result for name, result in results.items() if name.startswith(args.only)}
+
+    for name, result in results.items():
+        print(f"{name:<42} {result['median_ms']:10.3f} ms  (min {result['min_ms']:.3f}, {result['runs']} runs)")
+    for name in skipped:
+        print(f"skipped: {name}")
+
+    report = {"environment": environment(), "results": results, "skipped": skipped}
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump(report, file, indent=2)
+
+    status = 0
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after, ratio in regressions:
+            print(f"REGRESSION {name}: {before:.3f} ms -> {after:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            status = 1
+        else:
+            print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%})")
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,60 +1,203 @@
-import json
+import importlib
 import os
+import sqlite3
 import sys
+import threading
 import time
+
+# --- Startup Timing ---
+# Taken before the Qt imports so the report covers the whole launch.
+_startup_marks = [("start", time.perf_counter())]
+STARTUP_REPORT = "--startup-report" in sys.argv or bool(os.environ.get("GLOBIZZ_STARTUP_REPORT"))
+
+def mark_startup(label):
+    _startup_marks.append((label, time.perf_counter()))
+
+def startup_report():
+    start = previous = _startup_marks[0][1]
+    lines = []
+    for label, at in _startup_marks[1:]:
+        lines.append(f"{label:<22}{(at - previous) * 1000:8.1f} ms  (total {(at - start) * 1000:8.1f} ms)")
+        previous = at
+    return "\n".join(lines)
+
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QLabel, QComboBox, QSpinBox,
     QPushButton, QTableWidget, QTableWidgetItem, QHBoxLayout, QMessageBox,
-    QDialog, QFormLayout, QLineEdit, QFrame, QTabWidget, QHeaderView
+    QDialog, QFormLayout, QLineEdit, QFrame, QTabWidget, QHeaderView, QTableView, QAbstractItemView,
+    QCompleter, QCheckBox, QFileDialog, QShortcut, QProgressBar, QDateEdit
 )
-from PyQt5.QtGui import QFont, QPalette, QColor, QIcon
-from PyQt5.QtCore import Qt, QSize, QDir
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-from reportlab.lib.units import inch
+from PyQt5.QtGui import QFont, QPalette, QColor, QKeySequence
+from PyQt5.QtCore import Qt, QDir, QModelIndex, QStringListModel, QTimer, QObject, pyqtSignal, QDate
 import logging
+# ReportLab is only pulled in through invoice_pdf, which is imported lazily (see render_invoice);
+# likewise reports (and NumPy) wait until the Reports tab is first opened.
+import instrumentation
+from cart import Cart, CartLine, format_rupees
+from invoice import BILLINGS_FOLDER, summary_rows
+from instrumentation import timed, timer
+from invoice_ledger import InvoiceLedger
+from inventory_io import export_inventory, import_inventory
+from invoice_worker import InvoiceRenderQueue
+from inventory_model import InventoryTableModel, ActionButtonsDelegate
+from inventory_store import (
+    INSERTED, UPDATED, REMOVED, RESET, InventoryCorruptError, InventoryRepository, open_inventory_store
+)
+from product_lookup import ProductIndex, looks_like_code
 
 # --- Logging Configuration ---
 logging.basicConfig(filename='app.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# --- Inventory File ---
+# --- Inventory Storage ---
 INVENTORY_FILE_PATH = "inventory.json"
+INVENTORY_DB_PATH = "inventory.db"
+INVENTORY_BACKEND = os.environ.get("GLOBIZZ_INVENTORY_BACKEND", "sqlite")  # "sqlite", "json" or "remote"
+# With the "remote" backend, counters share the inventory served by inventory_server.py.
+INVENTORY_SERVER = os.environ.get("GLOBIZZ_INVENTORY_SERVER", "127.0.0.1:8765")
+
+_inventory = None
+_remote_changes = None
+
+class RemoteChanges(QObject):
+    """Carries changes pushed by the inventory server over to the GUI thread."""
+
+    changed = pyqtSignal(object)
+
+    def __init__(self, repository):
+        super().__init__()
+        self.repository = repository
+        self.changed.connect(self.deliver)
+
+    def deliver(self, change):
+        self.repository.apply_external(change)
+
+def get_inventory():
+    global _inventory, _remote_changes
+    if _inventory is None:
+        if INVENTORY_BACKEND == "remote":
+            from inventory_client import RemoteInventoryStore
+            store = RemoteInventoryStore(INVENTORY_SERVER)
+            _inventory = InventoryRepository(store)
+            _remote_changes = RemoteChanges(_inventory)
+            store.subscribe(_remote_changes.changed.emit)
+        else:
+            store = open_inventory_store(INVENTORY_BACKEND, INVENTORY_FILE_PATH, INVENTORY_DB_PATH)
+            _inventory = InventoryRepository(store)
+    return _inventory
+
+# --- Invoice Ledger ---
+INVOICE_LEDGER_PATH = "invoices.db"
+
+_ledger = None
+
+def get_ledger():
+    global _ledger
+    if _ledger is None:
+        _ledger = InvoiceLedger(INVOICE_LEDGER_PATH)
+    return _ledger
 
 # --- Inventory Functions ---
+@timed("inventory.load")
 def load_inventory():
-    if os.path.exists(INVENTORY_FILE_PATH):
-        try:
-            with open(INVENTORY_FILE_PATH, "r") as file:
-                return json.load(file)
-        except json.JSONDecodeError:
-            return []
-    return []
-
-def save_inventory(inventory):
-    with open(INVENTORY_FILE_PATH, "w") as file:
-        json.dump(inventory, indent=4)
+    return get_inventory().products()
 
+@timed("inventory.add")
 def add_product(name, price, material_code):
-    inventory = load_inventory()
-    inventory.append({"name": name, "price": float(price), "material_code": material_code})
-    save_inventory(inventory)
-    return inventory
-
-def update_product(index, name, price, material_code):
-    inventory = load_inventory()
-    if 0 <= index < len(inventory):
-        inventory[index] = {"name": name, "price": float(price), "material_code": material_code}
-        save_inventory(inventory)
-    return inventory
-
-def delete_product(index):
-    inventory = load_inventory()
-    if 0 <= index < len(inventory):
-        del inventory[index]
-        save_inventory(inventory)
-    return inventory
+    return get_inventory().add(name, float(price), material_code)
+
+@timed("inventory.update")
+def update_product(product_id, name, price, material_code):
+    return get_inventory().update(product_id, name, float(price), material_code)
+
+@timed("inventory.delete")
+def delete_product(product_id):
+    return get_inventory().delete(product_id)
+
+# --- Invoice Rendering ---
+@timed("invoice.render")
+def render_invoice(invoice, filename, progress=None):
+    from invoice_pdf import build_invoice_pdf
+    build_invoice_pdf(invoice, filename, progress)
+
+def warm_invoice_renderer():
+    """Import ReportLab on a background thread so the first bill does not pay for it."""
+    threading.Thread(target=importlib.import_module, args=("invoice_pdf",),
+                     name="reportlab-warmup", daemon=True).start()
+
+# --- Shared Fonts ---
+_fonts = {}
+
+def ui_font(size, bold=False):
+    """One QFont per size and weight, shared by every widget (setFont copies it)."""
+    font = _fonts.get((size, bold))
+    if font is None:
+        font = _fonts[size, bold] = QFont("Segoe UI", size, QFont.Bold if bold else QFont.Normal)
+    return font
+
+# --- Refresh Scheduling ---
+class RefreshScheduler(QObject):
+    """Hands inventory changes to the screens at most once per event-loop tick.
+
+    Changes are queued per screen and delivered together on the next tick, with the screen's
+    updates disabled so a burst of edits repaints once. Hidden screens keep their queue until
+    they are shown. A RESET, or more than MAX_QUEUED changes, collapses the queue into a single
+    full refresh. pause() holds every delivery (e.g. while an import owns the inventory) until
+    resume().
+
+    A screen provides apply_changes(changes) and refresh(), and calls deliver(self) when shown.
+    """
+
+    MAX_QUEUED = 200
+
+    def __init__(self, repository, parent=None):
+        super().__init__(parent)
+        self._pending = {}  # screen -> queued changes, or None when it needs a full refresh
+        self._paused = False
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self.flush)
+        repository.subscribe(self.on_change)
+
+    def register(self, screen):
+        self._pending[screen] = []
+
+    def on_change(self, change):
+        for screen, queued in self._pending.items():
+            if queued is None:
+                continue
+            if change.kind == RESET or len(queued) >= self.MAX_QUEUED:
+                self._pending[screen] = None
+            else:
+                queued.append(change)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        for screen in list(self._pending):
+            if screen.isVisible():
+                self.deliver(screen)
+
+    def pause(self):
+        self._paused = True
+
+    def resume(self):
+        self._paused = False
+        self.flush()
+
+    def deliver(self, screen):
+        queued = self._pending.get(screen, [])
+        if queued == [] or self._paused:
+            return
+        self._pending[screen] = []
+        screen.setUpdatesEnabled(False)
+        try:
+            if queued is None:
+                screen.refresh()
+            else:
+                screen.apply_changes(queued)
+        finally:
+            screen.setUpdatesEnabled(True)
 
 # --- Dialogs ---
 class AddOrEditProductDialog(QDialog):
@@ -75,20 +218,20 @@ class AddOrEditProductDialog(QDialog):
         self.material_code_input = QLineEdit()
 
         if self.product:
-            self.name_input.setText(self.product["name"])
-            self.price_input.setText(str(self.product["price"]))
-            self.material_code_input.setText(self.product["material_code"])
+            self.name_input.setText(self.product.name)
+            self.price_input.setText(str(self.product.price))
+            self.material_code_input.setText(self.product.material_code)
 
         name_label = QLabel("Product Name:")
         price_label = QLabel("Price:")
         material_code_label = QLabel("Material Code:")
 
-        name_label.setFont(QFont("Segoe UI", 10))
-        price_label.setFont(QFont("Segoe UI", 10))
-        material_code_label.setFont(QFont("Segoe UI", 10))
-        self.name_input.setFont(QFont("Segoe UI", 10))
-        self.price_input.setFont(QFont("Segoe UI", 10))
-        self.material_code_input.setFont(QFont("Segoe UI", 10))
+        name_label.setFont(ui_font(10))
+        price_label.setFont(ui_font(10))
+        material_code_label.setFont(ui_font(10))
+        self.name_input.setFont(ui_font(10))
+        self.price_input.setFont(ui_font(10))
+        self.material_code_input.setFont(ui_font(10))
 
         layout.addRow(name_label, self.name_input)
         layout.addRow(price_label, self.price_input)
@@ -96,12 +239,12 @@ class AddOrEditProductDialog(QDialog):
 
         button_layout = QHBoxLayout()
         self.save_button = QPushButton("Save")
-        self.save_button.setFont(QFont("Segoe UI", 10, QFont.Bold))
-        self.save_button.setStyleSheet("padding: 8px 15px; border-radius: 5px; background-color: #5cb85c; color: white;")
+        self.save_button.setFont(ui_font(10, bold=True))
+        self.save_button.setObjectName("saveButton")
         self.save_button.clicked.connect(self.accept)
         cancel_button = QPushButton("Cancel")
-        cancel_button.setFont(QFont("Segoe UI", 10))
-        cancel_button.setStyleSheet("padding: 8px 15px; border-radius: 5px;")
+        cancel_button.setFont(ui_font(10))
+        cancel_button.setObjectName("smallButton")
         cancel_button.clicked.connect(self.reject)
         button_layout.addWidget(self.save_button)
         button_layout.addWidget(cancel_button)
@@ -112,120 +255,297 @@ class AddOrEditProductDialog(QDialog):
     def get_data(self):
         return self.name_input.text(), self.price_input.text(), self.material_code_input.text()
 
+class DiagnosticsDialog(QDialog):
+    """Latency percentiles of the instrumented hot paths (Ctrl+Shift+D)."""
+
+    HEADERS = ["Operation", "Count", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnostics")
+        self.setMinimumSize(640, 360)
+        layout = QVBoxLayout()
+
+        self.enabled_box = QCheckBox("Collect timings")
+        self.enabled_box.setChecked(instrumentation.enabled())
+        self.enabled_box.toggled.connect(instrumentation.enable)
+        layout.addWidget(self.enabled_box)
+
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        for label, slot in (("Refresh", self.refresh), ("Reset", self.reset),
+                            ("Export…", self.export)):
+            button = QPushButton(label)
+            button.clicked.connect(slot)
+            button_layout.addWidget(button)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+        self.refresh()
+
+    def refresh(self):
+        metrics = instrumentation.snapshot()
+        self.table.setRowCount(len(metrics))
+        for row, (name, summary) in enumerate(metrics.items()):
+            values = [name, str(summary["count"])] + [
+                f"{summary[key] * 1000:.2f}" for key in ("p50", "p95", "p99", "max")]
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(value))
+
+    def reset(self):
+        instrumentation.reset()
+        self.refresh()
+
+    def export(self):
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "Export Metrics", "metrics.json", "JSON (*.json);;Prometheus text (*.prom)")
+        if not filename:
+            return
+        try:
+            instrumentation.export(filename)
+        except OSError as e:
+            QMessageBox.warning(self, "Export Failed", str(e))
+
+# --- Bulk Import ---
+class InventoryImportTask(QObject):
+    """Runs import_inventory on a worker thread; signals arrive on the GUI thread."""
+
+    progress = pyqtSignal(int)  # percent of the file read
+    finished = pyqtSignal(object)  # ImportResult
+    failed = pyqtSignal(str)
+
+    def __init__(self, path, parent=None):
+        super().__init__(parent)
+        self.path = path
+
+    def start(self):
+        threading.Thread(target=self._run, name="inventory-import", daemon=True).start()
+
+    def _run(self):
+        try:
+            with timer("inventory.import"):
+                result = import_inventory(get_inventory(), self.path, self.progress.emit)
+        except Exception as e:
+            logging.exception("Importing %s failed", self.path)
+            self.failed.emit(str(e))
+        else:
+            logging.info("Imported %s: %d added, %d updated, %d rejected",
+                         self.path, result.inserted, result.updated, result.rejected)
+            self.finished.emit(result)
+
 # --- Inventory Screen ---
 class InventoryScreen(QWidget):
     def __init__(self, parent):
         super().__init__()
         self.parent = parent
         self.layout = QVBoxLayout()
-        self.table = QTableWidget()
-        self.table.setColumnCount(4)
-        self.table.setHorizontalHeaderLabels(["Name", "Price", "Material Code", "Actions"])
-        self.table.setFont(QFont("Segoe UI", 10))
+        self.model = InventoryTableModel(self)
+        self.actions_delegate = ActionButtonsDelegate(self)
+        self.actions_delegate.editClicked.connect(self.edit_product)
+        self.actions_delegate.deleteClicked.connect(self.delete_product)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setItemDelegateForColumn(InventoryTableModel.ACTIONS_COLUMN, self.actions_delegate)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setFont(ui_font(10))
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Fixed row heights keep layout independent of the catalogue size.
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(40)
         self.layout.addWidget(self.table)
 
+        self.import_task = None
+        self.import_progress = QProgressBar()
+        self.import_progress.setFormat("Importing… %p%")
+        self.import_progress.hide()
+        self.layout.addWidget(self.import_progress)
+
         button_layout = QHBoxLayout()
-        add_button = QPushButton("Add Product")
-        add_button.setFont(QFont("Segoe UI", 10, QFont.Bold))
-        add_button.setStyleSheet("padding: 10px 20px; border-radius: 5px; background-color: #007bff; color: white;")
-        add_button.clicked.connect(self.add_product)
-        next_button = QPushButton("Next ➡️ Billing")
-        next_button.setFont(QFont("Segoe UI", 10))
-        next_button.setStyleSheet("padding: 10px 20px; border-radius: 5px; background-color: #28a745; color: white;")
-        next_button.clicked.connect(lambda: self.parent.setCurrentIndex(1))
-        button_layout.addWidget(add_button)
-        button_layout.addWidget(next_button)
+        self.add_button = QPushButton("Add Product")
+        self.add_button.setFont(ui_font(10, bold=True))
+        self.add_button.setObjectName("addProductButton")
+        self.add_button.clicked.connect(self.add_product)
+        self.next_button = QPushButton("Next ➡️ Billing")
+        self.next_button.setFont(ui_font(10))
+        self.next_button.setObjectName("nextButton")
+        self.next_button.clicked.connect(lambda: self.parent.setCurrentIndex(1))
+        self.import_button = QPushButton("Import…")
+        self.import_button.setFont(ui_font(10))
+        self.import_button.setObjectName("largeButton")
+        self.import_button.clicked.connect(self.import_products)
+        self.export_button = QPushButton("Export…")
+        self.export_button.setFont(ui_font(10))
+        self.export_button.setObjectName("largeButton")
+        self.export_button.clicked.connect(self.export_products)
+        button_layout.addWidget(self.add_button)
+        button_layout.addWidget(self.import_button)
+        button_layout.addWidget(self.export_button)
+        button_layout.addWidget(self.next_button)
         self.layout.addLayout(button_layout)
 
         self.setLayout(self.layout)
         self.load_inventory()
+        self.parent.refresh_scheduler.register(self)
 
     def load_inventory(self):
-        self.table.setRowCount(0)
-        self.inventory = load_inventory()
-        for index, item in enumerate(self.inventory):
-            self.table.insertRow(index)
-            self.table.setItem(index, 0, QTableWidgetItem(item["name"]))
-            self.table.setItem(index, 1, QTableWidgetItem(f"₹{item['price']:.2f}"))
-            self.table.setItem(index, 2, QTableWidgetItem(item["material_code"]))
-
-            edit_btn = QPushButton()
-            edit_btn.setIcon(QIcon(":/icons/edit.png"))  # Use a pen icon
-            edit_btn.setIconSize(QSize(20, 20))
-            edit_btn.setToolTip("Edit")
-            edit_btn.setStyleSheet("padding: 5px; border-radius: 3px; background-color: #ffc107;")
-            edit_btn.clicked.connect(lambda _, idx=index: self.edit_product(idx))
-
-            del_btn = QPushButton()
-            del_btn.setIcon(QIcon(":/icons/trash.png"))  # Use a trashcan icon
-            del_btn.setIconSize(QSize(20, 20))
-            del_btn.setToolTip("Delete")
-            del_btn.setStyleSheet("padding: 5px; border-radius: 3px; background-color: #dc3545;")
-            del_btn.clicked.connect(lambda _, idx=index: self.delete_product(idx))
-
-            hbox = QHBoxLayout()
-            hbox.addWidget(edit_btn)
-            hbox.addWidget(del_btn)
-            frame = QWidget()
-            frame.setLayout(hbox)
-            self.table.setCellWidget(index, 3, frame)
-
-        if hasattr(self.parent, 'billing_tab'):
-            self.parent.billing_tab.update_products()
+        with timer("inventory_screen.load"):
+            self.inventory = load_inventory()
+            self.model.set_products(self.inventory)
+
+    def refresh(self):
+        self.load_inventory()
+
+    def apply_changes(self, changes):
+        with timer("inventory_screen.apply_change"):
+            for change in changes:
+                if not self.model.apply_change(change):
+                    self.load_inventory()
+                    return
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # While an import holds the inventory, the view is refreshed when it finishes instead.
+        if self.import_task is None:
+            get_inventory().refresh()
+            self.parent.refresh_scheduler.deliver(self)
+
+    def import_products(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Products", "", "Product lists (*.csv *.jsonl *.ndjson)")
+        if not path:
+            return
+        self.import_task = InventoryImportTask(path, self)
+        self.import_task.progress.connect(self.import_progress.setValue)
+        self.import_task.finished.connect(self.on_import_finished)
+        self.import_task.failed.connect(self.on_import_failed)
+        self.set_importing(True)
+        self.import_progress.setValue(0)
+        self.import_progress.show()
+        self.import_task.start()
+
+    def set_importing(self, importing):
+        # The import holds the inventory until it commits, so anything here that reads or writes
+        # it (edit/delete in the table, add, export) would freeze the window until then.
+        for widget in (self.table, self.add_button, self.import_button, self.export_button):
+            widget.setEnabled(not importing)
+        # Likewise a Billing tab that has not been built yet loads the inventory as it opens.
+        billing_ready = not importing or self.parent.billing_tab is not None
+        self.parent.setTabEnabled(self.parent.indexOf(self.parent.billing_container), billing_ready)
+        self.next_button.setEnabled(billing_ready)
+        if importing:
+            self.parent.refresh_scheduler.pause()
+        else:
+            self.parent.refresh_scheduler.resume()
+
+    def end_import(self):
+        self.import_task = None
+        self.import_progress.hide()
+        # One RESET for the whole import, however many rows it touched.
+        get_inventory().refresh()
+        self.set_importing(False)
+
+    def on_import_finished(self, result):
+        self.end_import()
+        message = f"{result.inserted} added, {result.updated} updated, {result.rejected} rejected."
+        if result.errors:
+            message += "\n\n" + "\n".join(result.errors[:10])
+            if result.rejected > 10:
+                message += f"\n… and {result.rejected - 10} more"
+        QMessageBox.information(self, "Import Complete", message)
+
+    def on_import_failed(self, error):
+        self.end_import()
+        QMessageBox.critical(self, "Import Failed", f"The import stopped: {error}")
+
+    def export_products(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Products", "inventory.csv", "CSV (*.csv);;JSON Lines (*.jsonl)")
+        if not path:
+            return
+        try:
+            count = export_inventory(load_inventory(), path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Export Failed", str(e))
+            return
+        QMessageBox.information(self, "Export Complete", f"Exported {count} products to {path}")
 
     def add_product(self):
         dialog = AddOrEditProductDialog(self, "Add")
         if dialog.exec_():
             name, price, code = dialog.get_data()
-            self.inventory = add_product(name, price, code)
-            self.load_inventory()
+            try:
+                add_product(name, price, code)
+            except (ValueError, ConnectionError) as e:
+                QMessageBox.warning(self, "Invalid Product", str(e))
 
     def edit_product(self, index):
-        item = self.inventory[index]
+        item = self.model.product(index)
         dialog = AddOrEditProductDialog(self, "Edit", item)
         if dialog.exec_():
             name, price, code = dialog.get_data()
-            self.inventory = update_product(index, name, price, code)
-            self.load_inventory()
+            try:
+                update_product(item.id, name, price, code)
+            except (ValueError, ConnectionError) as e:
+                QMessageBox.warning(self, "Invalid Product", str(e))
 
     def delete_product(self, index):
+        # Resolved before the dialog: its event loop can apply other counters' edits and move rows.
+        product = self.model.product(index)
         confirm = QMessageBox.question(self, "Confirm", "Are you sure you want to delete this product?",
                                             QMessageBox.Yes | QMessageBox.No)
         if confirm == QMessageBox.Yes:
-            self.inventory = delete_product(index)
-            self.load_inventory()
+            try:
+                delete_product(product.id)
+            except (ValueError, ConnectionError) as e:
+                QMessageBox.warning(self, "Could Not Delete", str(e))
 
 # --- Billing Screen ---
 class BillingScreen(QWidget):
     def __init__(self, parent):
         super().__init__()
         self.parent = parent
-        self.cart = []
+        self.cart = Cart()
         self.layout = QVBoxLayout()
 
         self.title = QLabel("Billing")
-        self.title.setFont(QFont("Segoe UI", 20, QFont.Bold))
+        self.title.setFont(ui_font(20, bold=True))
         self.title.setAlignment(Qt.AlignCenter)
         self.layout.addWidget(self.title)
 
         input_layout = QHBoxLayout()
-        self.product_combo = QComboBox()
-        self.product_combo.setFont(QFont("Segoe UI", 10))
+        self.product_index = ProductIndex()
+        self.selected_product = None
+        self.matches = []
+        self.product_search = QLineEdit()
+        self.product_search.setFont(ui_font(10))
+        self.product_search.setPlaceholderText("Scan material code or type a product name")
+        self.match_model = QStringListModel(self)
+        self.completer = QCompleter(self.match_model, self)
+        # Matches are already ranked by the index; the completer only displays them.
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.completer.setMaxVisibleItems(12)
+        self.completer.activated[QModelIndex].connect(self.select_match)
+        self.product_search.setCompleter(self.completer)
+        self.product_search.textEdited.connect(self.search_products)
+        self.product_search.returnPressed.connect(self.on_search_return)
         self.quantity_spin = QSpinBox()
         self.quantity_spin.setMinimum(1)
-        self.quantity_spin.setFont(QFont("Segoe UI", 10))
+        self.quantity_spin.setFont(ui_font(10))
         self.gst_combo = QComboBox()
         self.gst_combo.addItem("No GST", 0.0)
         self.gst_combo.addItem("GST 18%", 0.18)
         self.gst_combo.addItem("GST 28%", 0.28)
-        self.gst_combo.setFont(QFont("Segoe UI", 10))
+        self.gst_combo.setFont(ui_font(10))
         self.add_button = QPushButton("Add to Cart")
-        self.add_button.setFont(QFont("Segoe UI", 10, QFont.Bold))
-        self.add_button.setStyleSheet("padding: 8px 15px; border-radius: 5px; background-color: #00c853; color: white;")
+        self.add_button.setFont(ui_font(10, bold=True))
+        self.add_button.setObjectName("addToCartButton")
         self.add_button.clicked.connect(self.add_to_cart)
         input_layout.addWidget(QLabel("Product:"))
-        input_layout.addWidget(self.product_combo)
+        input_layout.addWidget(self.product_search)
         input_layout.addWidget(QLabel("Quantity:"))
         input_layout.addWidget(self.quantity_spin)
         input_layout.addWidget(QLabel("GST:"))
@@ -235,166 +555,315 @@ class BillingScreen(QWidget):
 
         self.cart_table = QTableWidget(0, 5)  # Add one column for serial number
         self.cart_table.setHorizontalHeaderLabels(["Sr.No", "Product", "Qty", "Price", "Total"])
-        self.cart_table.setFont(QFont("Segoe UI", 10))
+        self.cart_table.setFont(ui_font(10))
         self.cart_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.cart_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.layout.addWidget(self.cart_table)
 
+        totals_layout = QHBoxLayout()
+        self.totals_label = QLabel()
+        self.totals_label.setFont(ui_font(10, bold=True))
+        remove_button = QPushButton("Remove Line")
+        remove_button.setFont(ui_font(10))
+        remove_button.setObjectName("smallButton")
+        remove_button.clicked.connect(self.remove_from_cart)
+        totals_layout.addWidget(remove_button)
+        totals_layout.addStretch()
+        totals_layout.addWidget(self.totals_label)
+        self.layout.addLayout(totals_layout)
+        self.update_totals()
+
         billed_to_layout = QHBoxLayout()
         self.name_input = QLineEdit()
-        self.name_input.setFont(QFont("Segoe UI", 10))
+        self.name_input.setFont(ui_font(10))
         billed_to_layout.addWidget(QLabel("Billed To:"))
         billed_to_layout.addWidget(self.name_input)
         self.layout.addLayout(billed_to_layout)
 
         generate_button = QPushButton("Generate Bill")
-        generate_button.setFont(QFont("Segoe UI", 12, QFont.Bold))
-        generate_button.setStyleSheet("padding: 10px 20px; border-radius: 5px; background-color: #3f51b5; color: white;")
+        generate_button.setFont(ui_font(12, bold=True))
+        generate_button.setObjectName("generateButton")
         generate_button.clicked.connect(self.generate_pdf)
         self.layout.addWidget(generate_button)
 
+        self.status_label = QLabel("")
+        self.status_label.setFont(ui_font(9))
+        self.layout.addWidget(self.status_label)
+
         back_button = QPushButton("⬅️ Inventory")
-        back_button.setFont(QFont("Segoe UI", 10))
-        back_button.setStyleSheet("padding: 8px 15px; border-radius: 5px;")
+        back_button.setFont(ui_font(10))
+        back_button.setObjectName("smallButton")
         back_button.clicked.connect(lambda: self.parent.setCurrentIndex(0))
         self.layout.addWidget(back_button)
 
         self.setLayout(self.layout)
         self.update_products()
+        self.parent.refresh_scheduler.register(self)
+        self.parent.invoice_queue.progress.connect(self.on_invoice_progress)
+        self.parent.invoice_queue.finished.connect(self.on_invoice_finished)
+        self.parent.invoice_queue.failed.connect(self.on_invoice_failed)
 
     def update_products(self):
-        self.product_combo.clear()
-        self.products = load_inventory()
-        for p in self.products:
-            self.product_combo.addItem(f"{p['name']} (₹{p['price']:.2f})", p)
+        with timer("billing.update_products"):
+            self.product_index.rebuild(load_inventory())
+            self.refresh_selection()
+
+    @staticmethod
+    def product_label(product):
+        return f"{product.name} [{product.material_code}] (₹{product.price:.2f})"
+
+    def refresh(self):
+        self.update_products()
+
+    def apply_changes(self, changes):
+        with timer("billing.apply_change"):
+            for change in changes:
+                if change.kind == INSERTED:
+                    self.product_index.add(change.product)
+                elif change.kind == UPDATED:
+                    self.product_index.update(change.product)
+                elif change.kind == REMOVED:
+                    self.product_index.remove(change.product)
+            self.refresh_selection()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # Inventory edits made while another tab was open are applied now, in one go.
+        self.parent.refresh_scheduler.deliver(self)
+
+    def refresh_selection(self):
+        # Keep the picked product in step with edits made on the inventory tab.
+        if self.selected_product is not None:
+            product = self.product_index.get(self.selected_product.id)
+            if product is None:
+                self.product_search.clear()
+            self.selected_product = product
+
+    def search_products(self, text):
+        self.selected_product = None
+        with timer("billing.search"):
+            self.matches = self.product_index.search(text)
+        self.match_model.setStringList([self.product_label(p) for p in self.matches])
+        if self.matches:
+            self.completer.complete()
+
+    def select_match(self, index):
+        if 0 <= index.row() < len(self.matches):
+            self.selected_product = self.matches[index.row()]
+            self.product_search.setText(self.product_label(self.selected_product))
+
+    def on_search_return(self):
+        # Barcode scanners type the material code followed by Enter.
+        text = self.product_search.text()
+        product = self.product_index.by_code(text)
+        if product is not None:
+            self.selected_product = product
+        elif self.selected_product is None:
+            # A misread or cut-off barcode must not bill whichever product its text happens to
+            # prefix; the top match is only taken for a typed name.
+            if looks_like_code(text) or not self.matches:
+                if text.strip():
+                    unknown = "material code" if looks_like_code(text) else "product"
+                    self.status_label.setText(f"Unknown {unknown}: {text.strip()}")
+                    self.product_search.selectAll()
+                return
+            self.selected_product = self.matches[0]
+        self.add_to_cart()
 
     def add_to_cart(self):
-        index = self.product_combo.currentIndex()
-        if index < 0:
+        product = self.selected_product
+        if product is None:
             return
-        product = self.products[index]
         qty = self.quantity_spin.value()
         gst_rate = self.gst_combo.currentData()
-        price = product['price']
-        total_without_gst = price * qty
-        gst_amount = total_without_gst * gst_rate
-        total_with_gst = total_without_gst + gst_amount
-        self.cart.append((product, qty, price, gst_rate, total_with_gst))
+        line = self.cart.add(CartLine.for_product(product, qty, gst_rate))
 
         row = self.cart_table.rowCount()
         self.cart_table.insertRow(row)
         self.cart_table.setItem(row, 0, QTableWidgetItem(str(row + 1)))  # Add serial number
-        self.cart_table.setItem(row, 1, QTableWidgetItem(product['name']))
-        self.cart_table.setItem(row, 2, QTableWidgetItem(str(qty)))
-        self.cart_table.setItem(row, 3, QTableWidgetItem(f"₹{price:.2f}"))
-        self.cart_table.setItem(row, 4, QTableWidgetItem(f"₹{total_with_gst:.2f}"))
+        self.cart_table.setItem(row, 1, QTableWidgetItem(line.name))
+        self.cart_table.setItem(row, 2, QTableWidgetItem(str(line.qty)))
+        self.cart_table.setItem(row, 3, QTableWidgetItem(f"₹{format_rupees(line.price)}"))
+        self.cart_table.setItem(row, 4, QTableWidgetItem(f"₹{format_rupees(line.total)}"))
+        self.update_totals()
+
+        # Ready for the next scan.
+        self.selected_product = None
+        self.product_search.clear()
+
+    def remove_from_cart(self):
+        row = self.cart_table.currentRow()
+        if row < 0:
+            return
+        self.cart.remove(row)
+        self.cart_table.removeRow(row)
+        for below in range(row, self.cart_table.rowCount()):
+            self.cart_table.item(below, 0).setText(str(below + 1))
+        self.update_totals()
+
+    def update_totals(self):
+        # Reads the cart's running per-slab totals; nothing is summed here.
+        self.totals_label.setText("   ".join(
+            f"{label}: ₹{format_rupees(paise)}" for label, paise in summary_rows(self.cart.totals())))
 
     def generate_pdf(self):
         billed_to = self.name_input.text()
         if not billed_to:
             QMessageBox.warning(self, "Missing Name", "Please enter the name of the person being billed.")
             return
+        if not self.cart:
+            # Recording it would use up an order number and count as a sale in the reports.
+            QMessageBox.warning(self, "Empty Cart", "Please add at least one product to the bill.")
+            return
 
-        import os
-        import time
-        from reportlab.lib.pagesizes import letter
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-        from reportlab.lib import colors
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-
-        order_no = f"ORD{int(time.time())}"
-        desktop = os.path.expanduser("~/Desktop")
-        billings_folder = os.path.join(desktop, "globizz-app-billings")
-        os.makedirs(billings_folder, exist_ok=True)
-        filename = os.path.join(billings_folder, f"{order_no}.pdf")
-
-        doc = SimpleDocTemplate(filename, pagesize=letter)
-        elements = []
-        styles = getSampleStyleSheet()
-        title_style = styles['Title']
-        title_style.alignment = 1
-        normal_style = styles['Normal']
-        normal_style.fontSize = 10
-        bold_style = ParagraphStyle(name='Bold', parent=normal_style, fontName='Helvetica-Bold')
-
-        # Header
-        elements.append(Paragraph("Globizz Solutions", title_style))
-        elements.append(Spacer(1, 0.1 * inch))
-        elements.append(Paragraph("Address: G.T.B. Nagar,Ludhiana - 141015 (Punjab)", normal_style))
-        elements.append(Paragraph("Mail: sanjiv@globizzsolutions.com, globizzsolutions@gmail.com", normal_style))
-        elements.append(Paragraph("Phone: 98728-71664, 9915700364, 0161-4100361", normal_style))
-        elements.append(Spacer(1, 0.2 * inch))
-        elements.append(Paragraph(f"Order No.: {order_no}", normal_style))
-        elements.append(Paragraph(f"Billed To: {billed_to}", normal_style))
-        elements.append(Paragraph(f"Date: {time.strftime('%d %B %Y')}", normal_style))
-        elements.append(Spacer(1, 0.3 * inch))
-
-        # Product Table
-        data = [["Sr.No", "Product", "Qty", "Price", "Total"]]
-        net_total = 0
-
-        for i, (product, qty, price, gst_rate, total) in enumerate(self.cart):
-            data.append([
-                str(i + 1),
-                product['name'],
-                str(qty),
-                f"Rs {price:.2f}",
-                f"Rs {total:.2f}"
-            ])
-            net_total += total
-
-        product_table = Table(data, colWidths=[40, 240, 50, 80, 80])
-        product_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ]))
-
-        elements.append(product_table)
-        elements.append(Spacer(1, 0.3 * inch))
-
-        # Charges Calculations
-        freight = round(net_total * 0.025, 2)
-        gst_rate = self.cart[0][3] if self.cart else 0.18  # Default GST if cart is empty
-        gst = round((net_total + freight) * gst_rate, 2)
-        gross_total = net_total + freight + gst
-
-        # Elegant Summary Table (Compact & Right-Aligned)
-        summary_data = [
-            ["Net Total", f"Rs {net_total:.2f}"],
-            ["Freight (2.5%)", f"Rs {freight:.2f}"],
-            [f"GST ({gst_rate * 100:.0f}%)", f"Rs {gst:.2f}"],
-            ["Gross Total", f"Rs {gross_total:.2f}"]
-        ]
-
-        summary_table = Table(summary_data, colWidths=[150, 100])
-        summary_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -2), 'Helvetica'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-            ('RIGHTPADDING', (1, 0), (1, -1), 6),
-            ('TOPPADDING', (0, 0), (-1, -1), 3),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-            ('LINEABOVE', (0, -1), (-1, -1), 1, colors.black),
-        ]))
-
-        # Wrap in right-aligned layout
-        summary_wrapper = Table([[Spacer(1, 0), summary_table]], colWidths=[350, 250])
-        elements.append(summary_wrapper)
-        elements.append(Spacer(1, 0.5 * inch))
-
-        elements.append(Paragraph("Thank you for your business!", normal_style))
-        doc.build(elements)
-
-        QMessageBox.information(self, "Success", f"Bill generated and saved to: {filename}")
-
-        # Clear cart UI
-        self.cart = []
-        self.cart_table.setRowCount(0)
+        with timer("billing.generate_pdf"):
+            try:
+                # The ledger issues the order number, so two bills can never share one.
+                invoice = get_ledger().record(billed_to, self.cart)
+            except sqlite3.Error as e:
+                logging.exception("Could not record the bill in the invoice ledger")
+                QMessageBox.critical(self, "Ledger Error", f"The bill could not be saved: {e}")
+                return
+            order_no = invoice.order_no
+            os.makedirs(BILLINGS_FOLDER, exist_ok=True)
+            filename = os.path.join(BILLINGS_FOLDER, f"{order_no}.pdf")
+            self.parent.invoice_queue.submit(order_no, invoice, filename)
+            self.status_label.setText(f"Rendering {order_no}…")
+
+            # Clear cart UI; the cashier can start the next bill while this one renders.
+            self.cart.clear()
+            self.cart_table.setRowCount(0)
+            self.update_totals()
+            self.name_input.clear()
+
+    def on_invoice_progress(self, order_no, percent):
+        self.status_label.setText(f"Rendering {order_no}… {percent}%")
+
+    def on_invoice_finished(self, order_no, filename):
+        pending = self.parent.invoice_queue.pending()
+        queued = f" ({pending} more queued)" if pending else ""
+        self.status_label.setText(f"Bill {order_no} saved to: {filename}{queued}")
+
+    def on_invoice_failed(self, order_no, error):
+        self.status_label.setText(f"Bill {order_no} failed.")
+        QMessageBox.critical(self, "Error", f"Could not generate bill {order_no}: {error}")
+
+# --- Reports Screen ---
+class ReportsScreen(QWidget):
+    """Sales, GST and product reports over a date range, read from the ledger's rollups."""
+
+    def __init__(self, parent):
+        super().__init__()
+        from reports import REPORTS
+        self.parent = parent
+        self.report = None
+        self.layout = QVBoxLayout()
+
+        self.title = QLabel("Reports")
+        self.title.setFont(ui_font(20, bold=True))
+        self.title.setAlignment(Qt.AlignCenter)
+        self.layout.addWidget(self.title)
+
+        controls_layout = QHBoxLayout()
+        self.report_combo = QComboBox()
+        self.report_combo.setFont(ui_font(10))
+        for name, (label, _) in REPORTS.items():
+            self.report_combo.addItem(label, name)
+        self.report_combo.currentIndexChanged.connect(self.run_report)
+        controls_layout.addWidget(QLabel("Report:"))
+        controls_layout.addWidget(self.report_combo)
+        today = QDate.currentDate()
+        self.from_date = QDateEdit(QDate(today.year(), 1, 1))
+        self.to_date = QDateEdit(today)
+        for label, date_edit in (("From:", self.from_date), ("To:", self.to_date)):
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat("dd MMM yyyy")
+            date_edit.setFont(ui_font(10))
+            date_edit.dateChanged.connect(self.run_report)
+            controls_layout.addWidget(QLabel(label))
+            controls_layout.addWidget(date_edit)
+        export_button = QPushButton("Export CSV…")
+        export_button.setFont(ui_font(10))
+        export_button.setObjectName("smallButton")
+        export_button.clicked.connect(self.export_report)
+        controls_layout.addWidget(export_button)
+        self.layout.addLayout(controls_layout)
+
+        self.table = QTableWidget(0, 0)
+        self.table.setFont(ui_font(10))
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.layout.addWidget(self.table)
+
+        self.status_label = QLabel("")
+        self.status_label.setFont(ui_font(9))
+        self.layout.addWidget(self.status_label)
+        self.setLayout(self.layout)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # Bills made since the tab was last shown are already in the rollups.
+        self.run_report()
+
+    def run_report(self):
+        from reports import display_rows, run_report
+        started = time.perf_counter()
+        try:
+            with timer("reports.run"):
+                self.report = run_report(get_ledger(), self.report_combo.currentData(),
+                                         self.from_date.date().toString("yyyy-MM-dd"),
+                                         self.to_date.date().toString("yyyy-MM-dd"))
+        except sqlite3.Error as e:
+            logging.exception("Could not run the %s report", self.report_combo.currentData())
+            QMessageBox.critical(self, "Ledger Error", f"The report could not be run: {e}")
+            return
+        rows = display_rows(self.report)
+        self.table.clear()
+        self.table.setColumnCount(len(self.report.headers))
+        self.table.setHorizontalHeaderLabels(self.report.headers)
+        self.table.setRowCount(len(rows))
+        for row, (values, raw) in enumerate(zip(rows, self.report.rows)):
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if isinstance(raw[column], int):
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, column, item)
+        elapsed = (time.perf_counter() - started) * 1000
+        self.status_label.setText(f"{self.report.title}: {len(rows)} rows in {elapsed:.0f} ms")
+
+    def export_report(self):
+        from reports import export_csv
+        if self.report is None:
+            return
+        suggested = (f"{self.report_combo.currentData()}-{self.from_date.date().toString('yyyyMMdd')}"
+                     f"-{self.to_date.date().toString('yyyyMMdd')}.csv")
+        filename, _ = QFileDialog.getSaveFileName(self, "Export Report", suggested, "CSV (*.csv)")
+        if not filename:
+            return
+        try:
+            count = export_csv(self.report, filename)
+        except OSError as e:
+            QMessageBox.warning(self, "Export Failed", str(e))
+            return
+        self.status_label.setText(f"Exported {count} rows to {filename}")
+
+# --- Lazy Tab ---
+class LazyTab(QWidget):
+    """Placeholder tab page that builds its real widget on first show."""
+
+    def __init__(self, factory):
+        super().__init__()
+        self.factory = factory
+        self.widget = None
+        self.layout = QVBoxLayout()
+        self.layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(self.layout)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.widget is None:
+            self.widget = self.factory()
+            self.layout.addWidget(self.widget)
 
 # --- Main Application ---
 class MainApp(QTabWidget):
@@ -448,8 +917,8 @@ class MainApp(QTabWidget):
                 border-color: #e1e1e1;
             }
 
-            /* QTableWidget */
-            QTableWidget {
+            /* Tables (QTableView also covers QTableWidget) */
+            QTableView {
                 background-color: #ffffff;
                 border: 1px solid #dcdcdc;
                 border-radius: 8px;
@@ -493,6 +962,37 @@ class MainApp(QTabWidget):
                 height: 0px;
             }
 
+            /* Screen buttons, picked out by object name */
+            QPushButton#smallButton, QPushButton#saveButton, QPushButton#addToCartButton {
+                padding: 8px 15px;
+                border-radius: 5px;
+            }
+            QPushButton#largeButton, QPushButton#addProductButton, QPushButton#nextButton,
+            QPushButton#generateButton {
+                padding: 10px 20px;
+                border-radius: 5px;
+            }
+            QPushButton#saveButton {
+                background-color: #5cb85c;
+                color: white;
+            }
+            QPushButton#addProductButton {
+                background-color: #007bff;
+                color: white;
+            }
+            QPushButton#nextButton {
+                background-color: #28a745;
+                color: white;
+            }
+            QPushButton#addToCartButton {
+                background-color: #00c853;
+                color: white;
+            }
+            QPushButton#generateButton {
+                background-color: #3f51b5;
+                color: white;
+            }
+
             /* Misc */
             QGroupBox {
                 border: 1px solid #dcdcdc;
@@ -506,20 +1006,62 @@ class MainApp(QTabWidget):
                 color: #444;
             }
         """)
+        self.invoice_queue = InvoiceRenderQueue(render_invoice, self)
+        self.refresh_scheduler = RefreshScheduler(get_inventory(), self)
         self.inventory_tab = InventoryScreen(self)
-        self.billing_tab = BillingScreen(self)
+        mark_startup("inventory tab")
+        # The billing tab (and its product index) is built the first time it is shown.
+        self.billing_tab = None
+        self.billing_container = LazyTab(self.build_billing_tab)
+        self.reports_tab = None
+        self.reports_container = LazyTab(self.build_reports_tab)
         self.addTab(self.inventory_tab, "🧾 Inventory")
-        self.addTab(self.billing_tab, "💰 Billing")
+        self.addTab(self.billing_container, "💰 Billing")
+        self.addTab(self.reports_container, "📊 Reports")
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, activated=self.show_diagnostics)
+
+    def build_billing_tab(self):
+        self.billing_tab = BillingScreen(self)
+        return self.billing_tab
+
+    def build_reports_tab(self):
+        self.reports_tab = ReportsScreen(self)
+        return self.reports_tab
+
+    def show_diagnostics(self):
+        DiagnosticsDialog(self).exec_()
+
+    def on_first_paint(self):
+        mark_startup("first paint")
+        logging.info("Startup timing:\n%s", startup_report())
+        if STARTUP_REPORT:
+            print(startup_report(), file=sys.stderr)
+        warm_invoice_renderer()
+
+    def closeEvent(self, event):
+        # Let bills that are still rendering reach the disk before exiting.
+        self.invoice_queue.shutdown(wait=True)
+        super().closeEvent(event)
 
 # --- Entry Point ---
 def main():
+    mark_startup("imports")
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
     # Load icons from the application's resource path
     icon_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'icons')
     QDir.addSearchPath("icons", icon_path)
-    main_app = MainApp()
+    mark_startup("qt application")
+    try:
+        main_app = MainApp()
+    except (InventoryCorruptError, ConnectionError) as e:
+        logging.exception("Could not open the inventory")
+        QMessageBox.critical(None, "Inventory Error", str(e))
+        sys.exit(1)
+    mark_startup("main window")
     main_app.show()
+    # Runs once the event loop has painted the window.
+    QTimer.singleShot(0, main_app.on_first_paint)
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
@@ -0,0 +1,111 @@
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+# --- Money ---
+# Amounts are whole paise (int); rates are Decimals. Floats never take part in totals.
+FREIGHT_RATE = Decimal("0.025")
+
+def to_decimal(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+def to_paise(rupees):
+    return int((to_decimal(rupees) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def apply_rate(paise, rate):
+    """paise * rate, rounded half-up to whole paise."""
+    return int((paise * to_decimal(rate)).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def format_rupees(paise):
+    sign = "-" if paise < 0 else ""
+    paise = abs(paise)
+    return f"{sign}{paise // 100}.{paise % 100:02d}"
+
+def format_rate(rate):
+    """0.18 -> '18', 0.025 -> '2.5'."""
+    return f"{(to_decimal(rate) * 100).normalize():f}"
+
+# --- Cart Line ---
+class CartLine:
+    """One billed line, with its money already worked out in paise."""
+
+    __slots__ = ("product_id", "name", "material_code", "qty", "price", "gst_rate", "net", "gst")
+
+    def __init__(self, product_id, name, material_code, qty, price, gst_rate):
+        self.product_id = product_id
+        self.name = name
+        self.material_code = material_code
+        self.qty = qty
+        self.price = to_paise(price)
+        self.gst_rate = to_decimal(gst_rate)
+        self.net = self.price * qty
+        self.gst = apply_rate(self.net, self.gst_rate)
+
+    @classmethod
+    def for_product(cls, product, qty, gst_rate):
+        # Copies what the bill needs instead of holding on to the product.
+        return cls(product.id, product.name, product.material_code, qty, product.price, gst_rate)
+
+    @property
+    def total(self):
+        return self.net + self.gst
+
+    def __repr__(self):
+        return f"CartLine({self.name!r}, qty={self.qty!r}, price={self.price!r}, gst_rate={self.gst_rate!r})"
+
+# --- Cart ---
+SlabTotals = namedtuple("SlabTotals", ["rate", "net", "freight", "gst"])
+CartTotals = namedtuple("CartTotals", ["net_total", "freight", "slabs", "gst", "gross_total"])
+
+class Cart:
+    """Cart lines plus running per-GST-slab subtotals.
+
+    Adding or removing a line touches one slab, so totals() costs O(number of slabs) no matter
+    how many lines the bill has. Freight is charged on each slab's net and taxed at that slab's rate.
+    """
+
+    def __init__(self, lines=()):
+        self.lines = []
+        self._slab_net = {}
+        self._slab_lines = {}
+        for line in lines:
+            self.add(line)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def add(self, line):
+        self.lines.append(line)
+        rate = line.gst_rate
+        self._slab_net[rate] = self._slab_net.get(rate, 0) + line.net
+        self._slab_lines[rate] = self._slab_lines.get(rate, 0) + 1
+        return line
+
+    def remove(self, index):
+        line = self.lines.pop(index)
+        rate = line.gst_rate
+        self._slab_lines[rate] -= 1
+        if self._slab_lines[rate]:
+            self._slab_net[rate] -= line.net
+        else:
+            del self._slab_lines[rate]
+            del self._slab_net[rate]
+        return line
+
+    def clear(self):
+        self.lines = []
+        self._slab_net = {}
+        self._slab_lines = {}
+
+    def totals(self):
+        slabs = []
+        for rate in sorted(self._slab_net):
+            net = self._slab_net[rate]
+            freight = apply_rate(net, FREIGHT_RATE)
+            slabs.append(SlabTotals(rate, net, freight, apply_rate(net + freight, rate)))
+        net_total = sum(slab.net for slab in slabs)
+        freight = sum(slab.freight for slab in slabs)
+        gst = sum(slab.gst for slab in slabs)
+        return CartTotals(net_total, freight, tuple(slabs), gst, net_total + freight + gst)
@@ -0,0 +1,151 @@
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# --- Hot-Path Timing ---
+# Off unless GLOBIZZ_METRICS=1 (or enable() is called, e.g. from the diagnostics dialog).
+# While off, timer() hands back a shared no-op and timed() wrappers cost one flag check.
+
+# Upper bounds in seconds, Prometheus style; the last bucket is +Inf.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WINDOW = 2048  # recent samples kept per metric for the percentiles
+
+_enabled = os.environ.get("GLOBIZZ_METRICS", "") not in ("", "0")
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+def enable(flag=True):
+    global _enabled
+    _enabled = bool(flag)
+
+def enabled():
+    return _enabled
+
+class Histogram:
+    """Latency distribution of one operation: cumulative buckets plus a window of recent samples."""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+            self.buckets = [0] * (len(BUCKETS) + 1)
+            self._recent = deque(maxlen=WINDOW)
+
+    def observe(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+            self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+            self._recent.append(seconds)
+
+    def summary(self):
+        with self._lock:
+            recent = sorted(self._recent)
+            summary = {"count": self.count, "sum": self.total, "max": self.max,
+                       "buckets": list(self.buckets)}
+        for label, q in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+            summary[label] = recent[min(len(recent) - 1, int(q * len(recent)))] if recent else 0.0
+        return summary
+
+def histogram(name):
+    h = _histograms.get(name)
+    if h is None:
+        with _histograms_lock:
+            h = _histograms.setdefault(name, Histogram(name))
+    return h
+
+class _Timer:
+    __slots__ = ("_histogram", "_started")
+
+    def __init__(self, name):
+        self._histogram = histogram(name)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._started)
+        return False
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_TIMER = _NoTimer()
+
+def timer(name):
+    """Context manager timing its block into the named histogram."""
+    return _Timer(name) if _enabled else _NO_TIMER
+
+def timed(name):
+    """Decorator timing each call into the named histogram."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram(name).observe(time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+# --- Export ---
+def snapshot():
+    """{name: summary} for every metric recorded so far; times are in seconds."""
+    with _histograms_lock:
+        histograms = sorted(_histograms.values(), key=lambda h: h.name)
+    return {h.name: h.summary() for h in histograms}
+
+def reset():
+    with _histograms_lock:
+        histograms = list(_histograms.values())
+    for h in histograms:
+        h.reset()
+
+def to_json():
+    return json.dumps({"generated_at": time.time(), "bucket_bounds": list(BUCKETS), "metrics": snapshot()}, indent=2)
+
+def to_prometheus(prefix="globizz"):
+    lines = []
+    for name, summary in snapshot().items():
+        metric = f"{prefix}_{name.replace('.', '_')}_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, count in zip(BUCKETS + ("+Inf",), summary["buckets"]):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f"{metric}_sum {summary['sum']:.6f}")
+        lines.append(f"{metric}_count {summary['count']}")
+        lines.append(f"# TYPE {metric}_recent gauge")
+        for label, q in (("p50", "0.5"), ("p95", "0.95"), ("p99", "0.99")):
+            lines.append(f'{metric}_recent{{quantile="{q}"}} {summary[label]:.6f}')
+    return "\n".join(lines) + "\n"
+
+def export(path):
+    """Write the metrics to path: Prometheus text for .prom/.txt, JSON otherwise."""
+    text = to_prometheus() if path.endswith((".prom", ".txt")) else to_json()
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as file:
+        file.write(text)
+    os.replace(temp_path, path)
@@ -0,0 +1,271 @@
+import asyncio
+import concurrent.futures
+import json
+import logging
+import threading
+
+from inventory_server import encode, open_connection
+from inventory_store import (
+    INSERTED, REMOVED, RESET, UPDATED, DuplicateMaterialCodeError, InventoryChange, InventoryConflictError,
+    InventoryStore,
+)
+from models import Product
+
+# --- Inventory Client ---
+class InventoryClient:
+    """Connection pool for an InventoryServer, driven by an asyncio loop on its own thread.
+
+    Requests made in the same loop iteration (e.g. from several threads at once) are sent together
+    as one frame over one pooled connection.
+    """
+
+    def __init__(self, address, pool_size=4, timeout=10.0):
+        self.address = address
+        self.timeout = timeout
+        self._pending = []
+        self._idle = []
+        self._tasks = set()  # asyncio only keeps weak references to running tasks
+        self._slots = asyncio.Semaphore(pool_size)
+        self._closed = False
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="inventory-client", daemon=True)
+        self._thread.start()
+
+    def call(self, op, **args):
+        """Send one request and wait for its result; server-side errors are raised here."""
+        future = asyncio.run_coroutine_threadsafe(self._request(dict(args, op=op)), self._loop)
+        try:
+            return future.result(self.timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise ConnectionError(f"The inventory server at {self.address} did not answer in time") from None
+
+    async def _request(self, request):
+        future = self._loop.create_future()
+        if not self._pending:
+            self._loop.call_soon(self._flush)
+        self._pending.append((request, future))
+        response = await future
+        if not response["ok"]:
+            raise _error(response)
+        return response
+
+    def _spawn(self, coroutine):
+        task = self._loop.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _flush(self):
+        batch, self._pending = self._pending, []
+        self._spawn(self._send(batch))
+
+    async def _exchange(self, connection, frame):
+        """Send one frame and read its results; None (and the connection closed) if that failed."""
+        reader, writer = connection
+        try:
+            writer.write(frame)
+            await writer.drain()
+            line = await reader.readline()
+            if line:
+                results = json.loads(line)["results"]
+                self._idle.append(connection)
+                return results
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning("Inventory server request failed: %s", e)
+        writer.close()
+        return None
+
+    async def _send(self, batch):
+        frame = encode({"requests": [request for request, _ in batch]})
+        results = None
+        async with self._slots:
+            if self._idle:
+                # A server restart leaves pooled connections dead; then retry once on a fresh one.
+                results = await self._exchange(self._idle.pop(), frame)
+            if results is None:
+                try:
+                    connection = await open_connection(self.address)
+                except OSError as e:
+                    logging.warning("Could not connect to the inventory server: %s", e)
+                else:
+                    results = await self._exchange(connection, frame)
+        for (_, future), result in zip(batch, results or [None] * len(batch)):
+            if future.done():
+                continue
+            if result is None:
+                future.set_exception(ConnectionError(f"Lost the connection to the inventory server at {self.address}"))
+            else:
+                future.set_result(result)
+
+    def follow(self, on_frame):
+        """Stream pushed frames to on_frame (on the client thread), reconnecting as needed.
+
+        on_frame(None) marks a lost connection; a new snapshot follows the reconnect.
+        """
+        self._loop.call_soon_threadsafe(lambda: self._spawn(self._follow(on_frame)))
+
+    async def _follow(self, on_frame):
+        delay = 0.5
+        while not self._closed:
+            writer = None
+            try:
+                reader, writer = await open_connection(self.address)
+                writer.write(encode({"subscribe": True}))
+                await writer.drain()
+                delay = 0.5
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    on_frame(json.loads(line))
+            except (OSError, ValueError) as e:
+                logging.warning("Inventory subscription to %s failed: %s", self.address, e)
+            finally:
+                if writer is not None:
+                    writer.close()
+            on_frame(None)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 10.0)
+
+    def close(self):
+        self._closed = True
+        def stop():
+            for _, writer in self._idle:
+                writer.close()
+            self._loop.stop()
+        self._loop.call_soon_threadsafe(stop)
+
+def _error(response):
+    if response["error"] == "duplicate":
+        return DuplicateMaterialCodeError(response["material_code"])
+    if response["error"] == "conflict":
+        return InventoryConflictError(Product.from_dict(response["current"]))
+    return RuntimeError(f"Inventory server: {response['message']}")
+
+# --- Remote Store ---
+class RemoteInventoryStore(InventoryStore):
+    """InventoryStore served by an InventoryServer.
+
+    Reads come from a local mirror that the server keeps current by pushing every change, so
+    all() and get() never touch the network. Writes are round-trips that return once their change
+    has reached the mirror. Updates and deletes carry the product as this counter last saw it, and
+    the server refuses them with InventoryConflictError if another counter changed it since.
+
+    Listeners (see subscribe) get an InventoryChange per pushed edit, on the client thread.
+    version() only moves when the whole mirror is replaced (first connect, reconnect or a bulk
+    import); single edits reach InventoryRepository through apply_external instead.
+    """
+
+    def __init__(self, address, pool_size=4, timeout=10.0):
+        self.address = address
+        self._client = InventoryClient(address, pool_size, timeout)
+        self._changed = threading.Condition()
+        self._products = {}
+        self._incoming = None
+        self._server_version = -1
+        self._generation = 0
+        self._listeners = []
+        self._client.follow(self._on_frame)
+        with self._changed:
+            if not self._changed.wait_for(lambda: self._generation, timeout):
+                self._client.close()
+                raise ConnectionError(f"Could not reach the inventory server at {address}")
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def _on_frame(self, frame):
+        if frame is None:
+            with self._changed:
+                self._incoming = None
+                self._server_version = -1
+            return
+        changes = []
+        with self._changed:
+            if "snapshot" in frame:
+                if self._incoming is None:
+                    self._incoming = {}
+                for record in frame["snapshot"]:
+                    self._incoming[record["id"]] = Product.from_dict(record)
+                if frame["more"]:
+                    return
+                self._products, self._incoming = self._incoming, None
+                self._generation += 1
+                changes.append(InventoryChange(RESET, None, None))
+            elif "put" in frame:
+                products = [Product.from_dict(record) for record in frame["put"]]
+                for product in products:
+                    old = self._products.get(product.id)
+                    self._products[product.id] = product
+                    if len(products) == 1:
+                        changes.append(InventoryChange(UPDATED if old is not None else INSERTED, None, product))
+                if len(products) > 1:
+                    self._generation += 1
+                    changes.append(InventoryChange(RESET, None, None))
+            elif "delete" in frame:
+                old = self._products.pop(frame["delete"], None)
+                if old is not None:
+                    changes.append(InventoryChange(REMOVED, None, old))
+            self._server_version = frame["version"]
+            self._changed.notify_all()
+        for change in changes:
+            for listener in list(self._listeners):
+                listener(change)
+
+    def _write(self, op, **args):
+        response = self._client.call(op, **args)
+        with self._changed:
+            # Read-your-writes: wait until our own change has come back through the subscription.
+            if not self._changed.wait_for(lambda: self._server_version >= response["version"], self._client.timeout):
+                raise ConnectionError(f"The inventory server at {self.address} stopped sending changes")
+        return response["result"]
+
+    def _expected(self, product_id):
+        with self._changed:
+            product = self._products.get(product_id)
+        return product.to_dict() if product is not None else None
+
+    def all(self):
+        with self._changed:
+            return list(self._products.values())
+
+    def get(self, product_id):
+        with self._changed:
+            return self._products.get(product_id)
+
+    def find_by_code(self, material_code):
+        with self._changed:
+            return next((p for p in self._products.values() if p.material_code == material_code), None)
+
+    def insert(self, name, price, material_code):
+        return Product.from_dict(self._write("insert", name=name, price=price, material_code=material_code))
+
+    def update(self, product_id, name, price, material_code):
+        result = self._write("update", id=product_id, name=name, price=price, material_code=material_code,
+                             expected=self._expected(product_id))
+        return Product.from_dict(result) if result is not None else None
+
+    def delete(self, product_id):
+        return self._write("delete", id=product_id, expected=self._expected(product_id))
+
+    def bulk_upsert(self, batches, progress=None):
+        # One server transaction per batch: a remote import that fails part-way keeps the batches
+        # already sent.
+        inserted = updated = done = 0
+        for batch in batches:
+            if not batch:
+                continue
+            result = self._write("bulk_upsert", rows=batch)
+            inserted += result["inserted"]
+            updated += result["updated"]
+            done += len(batch)
+            if progress is not None:
+                progress(done)
+        return inserted, updated
+
+    def version(self):
+        with self._changed:
+            return self._generation
+
+    def close(self):
+        self._client.close()
@@ -0,0 +1,185 @@
+import argparse
+import codecs
+import csv
+import json
+import math
+import os
+import sys
+import time
+from collections import namedtuple
+
+# --- Bulk Import / Export ---
+# Files are CSV or JSON Lines (chosen by extension) with the columns name, price and
+# material_code. Imports upsert by material code: known codes are updated, new ones inserted.
+# Rows are streamed and written in batches, so memory stays flat however long the file is.
+
+BATCH_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+COLUMNS = ("material_code", "name", "price")
+
+ImportResult = namedtuple("ImportResult", ["inserted", "updated", "rejected", "errors"])
+
+def file_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Unsupported file type '{extension}'; use .csv or .jsonl")
+
+def _column(name):
+    # "Material Code" and "material_code" name the same column.
+    return name.strip().lower().replace(" ", "_") if name else name
+
+def read_records(path, progress=None):
+    """Yield (line_no, record dict) from a CSV or JSONL file; progress(bytes_read, total_bytes)."""
+    kind = file_format(path)
+    total = os.path.getsize(path)
+    read = 0
+
+    with open(path, "rb") as file:
+        # Skip the byte order mark Excel puts at the start of UTF-8 CSVs.
+        if file.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8:
+            read = len(codecs.BOM_UTF8)
+        else:
+            file.seek(0)
+
+        def lines():
+            nonlocal read
+            for raw in file:
+                read += len(raw)
+                yield raw.decode("utf-8")
+
+        if kind == "csv":
+            reader = csv.reader(lines())
+            header = [_column(name) for name in next(reader, [])]
+            for record in reader:
+                if not any(record):
+                    continue
+                yield reader.line_num, dict(zip(header, record))
+                if progress is not None:
+                    progress(read, total)
+        else:
+            for line_no, line in enumerate(lines(), 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    record = e
+                if isinstance(record, dict):
+                    record = {_column(key): value for key, value in record.items()}
+                elif not isinstance(record, Exception):
+                    record = ValueError("expected a JSON object")
+                yield line_no, record
+                if progress is not None:
+                    progress(read, total)
+
+def parse_record(record):
+    """(name, price, material_code) from a raw record; raises ValueError if it is unusable."""
+    if isinstance(record, Exception):
+        raise ValueError(str(record))
+    name = str(record.get("name") or "").strip()
+    material_code = str(record.get("material_code") or "").strip()
+    if not name:
+        raise ValueError("name is empty")
+    if not material_code:
+        raise ValueError("material_code is empty")
+    try:
+        price = float(record.get("price"))
+    except (TypeError, ValueError):
+        raise ValueError(f"price {record.get('price')!r} is not a number") from None
+    if not math.isfinite(price) or price < 0:
+        raise ValueError(f"price {price} is out of range")
+    return name, price, material_code
+
+def import_inventory(repository, path, progress=None, batch_size=BATCH_SIZE):
+    """Validate and upsert every row of path in one commit. Bad rows are skipped and reported.
+
+    progress(percent) is called as the file is read. Runs happily on a worker thread; see
+    InventoryRepository.bulk_upsert for how the views are refreshed afterwards.
+    """
+    errors = []
+    rejected = 0
+    last_percent = -1
+
+    def report(read, total):
+        nonlocal last_percent
+        percent = int(100 * read / total) if total else 100
+        if progress is not None and percent != last_percent:
+            last_percent = percent
+            progress(percent)
+
+    def batches():
+        nonlocal rejected
+        batch = []
+        for line_no, record in read_records(path, report):
+            try:
+                batch.append(parse_record(record))
+            except ValueError as e:
+                rejected += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append(f"line {line_no}: {e}")
+                continue
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        yield batch
+
+    file_format(path)  # fail early, before the store is locked
+    inserted, updated = repository.bulk_upsert(batches())
+    return ImportResult(inserted, updated, rejected, errors)
+
+def export_inventory(products, path):
+    """Write products to a CSV or JSONL file; returns how many were written."""
+    kind = file_format(path)
+    count = 0
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", newline="", encoding="utf-8") as file:
+        if kind == "csv":
+            writer = csv.writer(file)
+            writer.writerow(COLUMNS)
+            for product in products:
+                writer.writerow((product.material_code, product.name, product.price))
+                count += 1
+        else:
+            for product in products:
+                file.write(json.dumps({"material_code": product.material_code, "name": product.name,
+                                       "price": product.price}) + "\n")
+                count += 1
+    os.replace(temp_path, path)
+    return count
+
+# --- Entry Point ---
+def main(argv=None):
+    from inventory_store import InventoryRepository, open_inventory_store
+
+    parser = argparse.ArgumentParser(description="Bulk import or export the inventory as CSV or JSONL.")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("path", help="a .csv or .jsonl file")
+    parser.add_argument("--backend", default=os.environ.get("GLOBIZZ_INVENTORY_BACKEND", "sqlite"),
+                        choices=("sqlite", "json"))
+    parser.add_argument("--json", default="inventory.json", help="JSON inventory (default: %(default)s)")
+    parser.add_argument("--db", default="inventory.db", help="SQLite inventory (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    repository = InventoryRepository(open_inventory_store(args.backend, args.json, args.db))
+    started = time.perf_counter()
+    try:
+        if args.command == "export":
+            count = export_inventory(repository.products(), args.path)
+            print(f"Exported {count} products to {args.path} in {time.perf_counter() - started:.2f}s")
+            return 0
+        result = import_inventory(repository, args.path,
+                                  lambda percent: print(f"\r{percent:3d}%", end="", file=sys.stderr))
+        print(file=sys.stderr)
+        for error in result.errors:
+            print(error, file=sys.stderr)
+        print(f"Imported {args.path} in {time.perf_counter() - started:.2f}s: {result.inserted} added, "
+              f"{result.updated} updated, {result.rejected} rejected")
+        return 0
+    finally:
+        repository.store.close()
+
+if __name__ == '__main__':
+    sys.exit(main())
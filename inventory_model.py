@@ -0,0 +1,142 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QRect, QEvent, pyqtSignal
+from PyQt5.QtGui import QColor, QIcon, QPainter
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyle, QToolTip
+from inventory_store import INSERTED, UPDATED, REMOVED
+
+# --- Inventory Table Model ---
+class InventoryTableModel(QAbstractTableModel):
+    """Read-only table model over the shared product list; rows are only formatted when the view paints them."""
+
+    HEADERS = ["Name", "Price", "Material Code", "Actions"]
+    ACTIONS_COLUMN = 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._products = []
+
+    def set_products(self, products):
+        self.beginResetModel()
+        self._products = list(products)
+        self.endResetModel()
+
+    def apply_change(self, change):
+        """Apply one repository change to the affected row; returns False if a full reset is needed."""
+        row = change.row
+        if change.kind == INSERTED and 0 <= row <= len(self._products):
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._products.insert(row, change.product)
+            self.endInsertRows()
+        elif change.kind == UPDATED and 0 <= row < len(self._products):
+            self._products[row] = change.product
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        elif change.kind == REMOVED and 0 <= row < len(self._products):
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._products[row]
+            self.endRemoveRows()
+        else:
+            return False
+        return True
+
+    def product(self, row):
+        return self._products[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._products)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        product = self._products[index.row()]
+        column = index.column()
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            if column == 0:
+                return product.name
+            if column == 1:
+                return f"₹{product.price:.2f}"
+            if column == 2:
+                return product.material_code
+        elif role == Qt.TextAlignmentRole and column == 1:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return str(section + 1)
+
+# --- Action Buttons Delegate ---
+class ActionButtonsDelegate(QStyledItemDelegate):
+    """Paints the edit/delete buttons of the actions column instead of creating widgets for every row."""
+
+    editClicked = pyqtSignal(int)
+    deleteClicked = pyqtSignal(int)
+
+    BUTTON_SIZE = 28
+    SPACING = 8
+    ICON_SIZE = 20
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.edit_icon = QIcon(":/icons/edit.png")
+        self.delete_icon = QIcon(":/icons/trash.png")
+        self.edit_color = QColor("#ffc107")
+        self.delete_color = QColor("#dc3545")
+
+    def _button_rects(self, cell):
+        size = self.BUTTON_SIZE
+        left = cell.center().x() - size - self.SPACING // 2
+        top = cell.center().y() - size // 2
+        edit_rect = QRect(left, top, size, size)
+        delete_rect = QRect(left + size + self.SPACING, top, size, size)
+        return edit_rect, delete_rect
+
+    def _paint_button(self, painter, rect, color, icon):
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(color)
+        painter.drawRoundedRect(rect, 3, 3)
+        icon_rect = QRect(0, 0, self.ICON_SIZE, self.ICON_SIZE)
+        icon_rect.moveCenter(rect.center())
+        icon.paint(painter, icon_rect)
+
+    def paint(self, painter, option, index):
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(option.rect, option.palette.highlight())
+        edit_rect, delete_rect = self._button_rects(option.rect)
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        self._paint_button(painter, edit_rect, self.edit_color, self.edit_icon)
+        self._paint_button(painter, delete_rect, self.delete_color, self.delete_icon)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        size = super().sizeHint(option, index)
+        size.setWidth(max(size.width(), 2 * self.BUTTON_SIZE + self.SPACING + 8))
+        size.setHeight(max(size.height(), self.BUTTON_SIZE + 8))
+        return size
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            edit_rect, delete_rect = self._button_rects(option.rect)
+            if edit_rect.contains(event.pos()):
+                self.editClicked.emit(index.row())
+                return True
+            if delete_rect.contains(event.pos()):
+                self.deleteClicked.emit(index.row())
+                return True
+        return super().editorEvent(event, model, option, index)
+
+    def helpEvent(self, event, view, option, index):
+        if event.type() == QEvent.ToolTip:
+            edit_rect, delete_rect = self._button_rects(option.rect)
+            if edit_rect.contains(event.pos()):
+                QToolTip.showText(event.globalPos(), "Edit", view)
+                return True
+            if delete_rect.contains(event.pos()):
+                QToolTip.showText(event.globalPos(), "Delete", view)
+                return True
+        return super().helpEvent(event, view, option, index)
@@ -0,0 +1,184 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+from inventory_store import DuplicateMaterialCodeError, InventoryConflictError, open_inventory_store
+from models import Product
+
+# --- Inventory Server ---
+# Lets several billing counters share one inventory. The server is the only process touching the
+# store; counters connect with inventory_client.RemoteInventoryStore.
+#
+# Wire format: one JSON object per line, over TCP ("host:port") or a Unix socket ("unix:/path").
+#   request connections:  {"requests": [{"op": ..., ...}, ...]}  ->  {"results": [...]}
+#   subscription:         {"subscribe": true}  ->  snapshot frames, then one frame per change
+# Results are {"ok": true, "result": ..., "version": n} or {"ok": false, "error": kind, "message": ...}.
+# `version` counts changes since the server started and orders the pushed frames.
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+LINE_LIMIT = 64 * 2**20  # largest frame either side will read
+
+def encode(frame):
+    return (json.dumps(frame, separators=(",", ":")) + "\n").encode()
+
+async def open_connection(address):
+    if address.startswith("unix:"):
+        return await asyncio.open_unix_connection(address[len("unix:"):], limit=LINE_LIMIT)
+    host, _, port = address.rpartition(":")
+    return await asyncio.open_connection(host or "127.0.0.1", int(port), limit=LINE_LIMIT)
+
+class InventoryServer:
+    """Serves one InventoryStore to many clients and pushes every change to subscribers.
+
+    Requests are handled one at a time on the event loop, so edits from different counters are
+    applied in a single order and each change is pushed exactly once, in version order.
+    """
+
+    SNAPSHOT_CHUNK = 5000  # products per snapshot frame
+    MAX_BACKLOG = 32 * 2**20  # bytes queued for a subscriber before it is dropped
+
+    def __init__(self, store):
+        self.store = store
+        self.version = 0
+        self._subscribers = set()
+
+    async def start(self, address):
+        if address.startswith("unix:"):
+            path = address[len("unix:"):]
+            if os.path.exists(path):
+                os.remove(path)
+            return await asyncio.start_unix_server(self._handle, path, limit=LINE_LIMIT)
+        host, _, port = address.rpartition(":")
+        return await asyncio.start_server(self._handle, host or "127.0.0.1", int(port), limit=LINE_LIMIT)
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                frame = json.loads(line)
+                if frame.get("subscribe"):
+                    self._send_snapshot(writer)
+                    self._subscribers.add(writer)
+                    continue
+                writer.write(encode({"results": [self._execute(request) for request in frame["requests"]]}))
+                await writer.drain()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning("Dropping inventory client: %s", e)
+        finally:
+            self._subscribers.discard(writer)
+            writer.close()
+
+    # Pushes
+    def _send_snapshot(self, writer):
+        # Written in one go with no await, so no change can slip in between the chunks.
+        products = self.store.all()
+        for start in range(0, max(len(products), 1), self.SNAPSHOT_CHUNK):
+            chunk = products[start:start + self.SNAPSHOT_CHUNK]
+            writer.write(encode({"snapshot": [p.to_dict() for p in chunk],
+                                 "more": start + self.SNAPSHOT_CHUNK < len(products),
+                                 "version": self.version}))
+
+    def _publish(self, frame):
+        self.version += 1
+        frame["version"] = self.version
+        data = encode(frame)
+        for writer in list(self._subscribers):
+            if writer.transport.get_write_buffer_size() > self.MAX_BACKLOG:
+                # It resubscribes and gets a fresh snapshot once it catches up.
+                logging.warning("Dropping a subscriber that stopped reading")
+                self._subscribers.discard(writer)
+                writer.close()
+                continue
+            writer.write(data)
+
+    # Requests
+    def _execute(self, request):
+        handler = getattr(self, f"_op_{request.get('op')}", None)
+        if handler is None:
+            return {"ok": False, "error": "bad_request", "message": f"Unknown operation {request.get('op')!r}"}
+        try:
+            result = handler(request)
+        except DuplicateMaterialCodeError as e:
+            return {"ok": False, "error": "duplicate", "material_code": e.material_code, "message": str(e)}
+        except InventoryConflictError as e:
+            return {"ok": False, "error": "conflict", "current": e.current.to_dict(), "message": str(e)}
+        except (KeyError, TypeError, ValueError) as e:
+            return {"ok": False, "error": "bad_request", "message": f"Bad {request.get('op')} request: {e!r}"}
+        return {"ok": True, "result": result, "version": self.version}
+
+    def _check_expected(self, request):
+        """Optimistic concurrency: refuse to overwrite a product that changed since the client read it."""
+        expected = request.get("expected")
+        current = self.store.get(request["id"])
+        if expected is not None and current is not None and current != Product.from_dict(expected):
+            raise InventoryConflictError(current)
+
+    def _op_version(self, request):
+        return self.version
+
+    def _op_get(self, request):
+        product = self.store.get(request["id"])
+        return product.to_dict() if product is not None else None
+
+    def _op_insert(self, request):
+        product = self.store.insert(request["name"], float(request["price"]), request["material_code"])
+        self._publish({"put": [product.to_dict()]})
+        return product.to_dict()
+
+    def _op_update(self, request):
+        self._check_expected(request)
+        product = self.store.update(request["id"], request["name"], float(request["price"]),
+                                    request["material_code"])
+        if product is None:
+            return None
+        self._publish({"put": [product.to_dict()]})
+        return product.to_dict()
+
+    def _op_delete(self, request):
+        self._check_expected(request)
+        deleted = self.store.delete(request["id"])
+        if deleted:
+            self._publish({"delete": request["id"]})
+        return deleted
+
+    def _op_bulk_upsert(self, request):
+        rows = [(name, float(price), code) for name, price, code in request["rows"]]
+        inserted, updated = self.store.bulk_upsert([rows])
+        codes = dict.fromkeys(code for _, _, code in rows)
+        self._publish({"put": [self.store.find_by_code(code).to_dict() for code in codes]})
+        return {"inserted": inserted, "updated": updated}
+
+# --- Entry Point ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Share one inventory between several billing counters.")
+    parser.add_argument("--listen", default=DEFAULT_ADDRESS, help="host:port or unix:/path (default: %(default)s)")
+    parser.add_argument("--backend", default="sqlite", choices=("sqlite", "json"))
+    parser.add_argument("--json", default="inventory.json", help="JSON inventory (default: %(default)s)")
+    parser.add_argument("--db", default="inventory.db", help="SQLite inventory (default: %(default)s)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    store = open_inventory_store(args.backend, args.json, args.db)
+    server = InventoryServer(store)
+
+    async def serve():
+        listener = await server.start(args.listen)
+        logging.info("Serving %s inventory on %s", args.backend, args.listen)
+        async with listener:
+            await listener.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,838 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+from models import Product
+
+# --- Errors ---
+class DuplicateMaterialCodeError(ValueError):
+    def __init__(self, material_code):
+        super().__init__(f"A product with material code '{material_code}' already exists.")
+        self.material_code = material_code
+
+class InventoryConflictError(ValueError):
+    def __init__(self, current):
+        super().__init__(f"'{current.name}' was changed at another counter in the meantime; "
+                         "the list now shows its latest values, please try again.")
+        self.current = current
+
+class InventoryCorruptError(RuntimeError):
+    def __init__(self, path, reason):
+        super().__init__(f"Inventory file {path} is unreadable ({reason}); it has been left untouched.")
+        self.path = path
+
+# --- Backends ---
+class InventoryStore:
+    """Common interface of the inventory backends. Products are addressed by id, not list position."""
+
+    def all(self):
+        raise NotImplementedError
+
+    def get(self, product_id):
+        raise NotImplementedError
+
+    def find_by_code(self, material_code):
+        raise NotImplementedError
+
+    def insert(self, name, price, material_code):
+        raise NotImplementedError
+
+    def update(self, product_id, name, price, material_code):
+        raise NotImplementedError
+
+    def delete(self, product_id):
+        raise NotImplementedError
+
+    def bulk_upsert(self, batches, progress=None):
+        """Insert or update (name, price, material_code) rows keyed by material code, as one commit.
+
+        batches yields lists of rows; progress(rows_done) is called after each one. Returns
+        (inserted, updated).
+        """
+        raise NotImplementedError
+
+    def version(self):
+        """Cheap token that changes whenever the stored inventory may have changed."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class JsonInventoryStore(InventoryStore):
+    """JSON backend built from a snapshot file plus an append-only journal.
+
+    Each mutation appends one small record to `<path>.journal`, so writes cost O(1) however big
+    the catalogue is. A background compactor folds the journal into a new snapshot, written to a
+    temporary file and atomically swapped in, so a crash never leaves a half-written inventory.
+    On open, the snapshot is read and then the journal records newer than it are replayed; a torn
+    last record (crash mid-append) is dropped.
+    """
+
+    COMPACT_AFTER = 1000  # journal records
+
+    def __init__(self, path, compact_after=COMPACT_AFTER):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.compacting_path = path + ".journal.compacting"
+        self.compact_after = compact_after
+        self._lock = threading.RLock()
+        self._journal = None
+        self._load()
+        self._compact_requested = threading.Event()
+        self._closed = False
+        self._compactor = threading.Thread(target=self._run_compactor, name="inventory-compactor", daemon=True)
+        self._compactor.start()
+
+    # Loading
+    def _stat(self):
+        stats = []
+        for path in (self.path, self.compacting_path, self.journal_path):
+            try:
+                stat = os.stat(path)
+                stats.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                stats.append(None)
+        return tuple(stats)
+
+    def _load(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        self._products = {}
+        self._codes = {}
+        self._seq = 0
+        self._next_id = 1
+        self._journal_records = 0
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as file:
+                    data = json.load(file)
+            except json.JSONDecodeError as e:
+                raise InventoryCorruptError(self.path, e) from None
+            if isinstance(data, list):  # legacy plain list
+                data = {"version": 0, "products": data}
+            self._seq = data.get("version", 0)
+            legacy_id = max((p.get("id", 0) for p in data["products"]), default=0) + 1
+            for record in data["products"]:
+                if "id" not in record:
+                    record["id"] = legacy_id
+                    legacy_id += 1
+                self._put(Product.from_dict(record))
+            self._next_id = max(data.get("next_id", 1), legacy_id)
+        for path in (self.compacting_path, self.journal_path):
+            self._replay(path)
+        self._known = self._stat()
+
+    def _replay(self, path):
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as file:
+            lines = file.readlines()
+        good_bytes = 0
+        for i, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                if i == len(lines) - 1:
+                    # Cut the torn record off so the next append starts on a clean line.
+                    logging.warning("Dropping torn last record of %s", path)
+                    os.truncate(path, good_bytes)
+                    break
+                raise InventoryCorruptError(path, f"bad record on line {i + 1}") from None
+            good_bytes += len(line)
+            if path == self.journal_path:
+                self._journal_records += 1
+            if record["seq"] <= self._seq:
+                continue
+            self._apply(record)
+
+    def _apply(self, record):
+        self._seq = record["seq"]
+        if record["op"] == "put":
+            product = Product.from_dict(record["product"])
+            self._put(product)
+            self._next_id = max(self._next_id, product.id + 1)
+        elif record["op"] == "delete":
+            self._remove(record["id"])
+
+    def _put(self, product):
+        old = self._products.get(product.id)
+        if old is not None and self._codes.get(old.material_code) == old.id:
+            del self._codes[old.material_code]
+        self._products[product.id] = product
+        if product.material_code:
+            self._codes[product.material_code] = product.id
+
+    def _remove(self, product_id):
+        old = self._products.pop(product_id, None)
+        if old is not None and self._codes.get(old.material_code) == product_id:
+            del self._codes[old.material_code]
+        return old
+
+    def _sync(self):
+        # Pick up another process's writes before reading or writing.
+        if self._stat() != self._known:
+            self._load()
+
+    # Writing
+    def _append(self, record, sync=True):
+        self._seq += 1
+        record["seq"] = self._seq
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a")
+        self._journal.write(json.dumps(record) + "\n")
+        if sync:
+            self._flush_journal()
+
+    def _flush_journal(self):
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_records += 1
+        self._known = self._stat()
+        if self._journal_records >= self.compact_after:
+            self._compact_requested.set()
+
+    def _check_code(self, material_code, product_id=None):
+        owner = self._codes.get(material_code) if material_code else None
+        if owner is not None and owner != product_id:
+            raise DuplicateMaterialCodeError(material_code)
+
+    def all(self):
+        with self._lock:
+            self._sync()
+            return list(self._products.values())
+
+    def version(self):
+        with self._lock:
+            self._sync()
+            return self._seq
+
+    def get(self, product_id):
+        with self._lock:
+            self._sync()
+            return self._products.get(product_id)
+
+    def find_by_code(self, material_code):
+        with self._lock:
+            self._sync()
+            return self._products.get(self._codes.get(material_code))
+
+    def insert(self, name, price, material_code):
+        with self._lock:
+            self._sync()
+            self._check_code(material_code)
+            product = Product(self._next_id, name, price, material_code)
+            self._next_id += 1
+            self._append({"op": "put", "product": product.to_dict()})
+            self._put(product)
+            return product
+
+    def update(self, product_id, name, price, material_code):
+        with self._lock:
+            self._sync()
+            if product_id not in self._products:
+                return None
+            self._check_code(material_code, product_id)
+            product = Product(product_id, name, price, material_code)
+            self._append({"op": "put", "product": product.to_dict()})
+            self._put(product)
+            return product
+
+    def delete(self, product_id):
+        with self._lock:
+            self._sync()
+            if product_id not in self._products:
+                return False
+            self._append({"op": "delete", "id": product_id})
+            self._remove(product_id)
+            return True
+
+    def bulk_upsert(self, batches, progress=None):
+        # Records are buffered and fsynced once per batch instead of once per product.
+        inserted = updated = done = 0
+        with self._lock:
+            self._sync()
+            for batch in batches:
+                if not batch:
+                    continue
+                for name, price, material_code in batch:
+                    product_id = self._codes.get(material_code)
+                    if product_id is None:
+                        product_id = self._next_id
+                        self._next_id += 1
+                        inserted += 1
+                    else:
+                        updated += 1
+                    product = Product(product_id, name, price, material_code)
+                    self._append({"op": "put", "product": product.to_dict()}, sync=False)
+                    self._put(product)
+                self._journal_records += len(batch) - 1
+                self._flush_journal()
+                done += len(batch)
+                if progress is not None:
+                    progress(done)
+        return inserted, updated
+
+    # Compaction
+    def compact(self):
+        """Fold the journal into a fresh snapshot. Safe to call while other threads keep writing."""
+        with self._lock:
+            self._sync()
+            # After an interrupted compaction the old records stay in place and the journal is
+            # rotated next time; replay skips whatever the new snapshot already covers.
+            if not os.path.exists(self.compacting_path):
+                if self._journal is not None:
+                    self._journal.close()
+                    self._journal = None
+                if os.path.exists(self.journal_path):
+                    os.replace(self.journal_path, self.compacting_path)
+                self._journal_records = 0
+            version, next_id, products = self._seq, self._next_id, list(self._products.values())
+            self._known = self._stat()
+
+        # Serializing the snapshot is the slow part and runs without the lock; writes go to a new journal.
+        snapshot = {"version": version, "next_id": next_id, "products": [p.to_dict() for p in products]}
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump(snapshot, file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        with self._lock:
+            os.replace(temp_path, self.path)
+            if os.path.exists(self.compacting_path):
+                os.remove(self.compacting_path)
+            self._known = self._stat()
+        logging.info("Compacted %s at version %d", self.path, snapshot["version"])
+
+    def _run_compactor(self):
+        while True:
+            self._compact_requested.wait()
+            self._compact_requested.clear()
+            if self._closed:
+                return
+            try:
+                self.compact()
+            except Exception:
+                logging.exception("Compacting %s failed", self.path)
+
+    def close(self):
+        self._closed = True
+        self._compact_requested.set()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+
+class SqliteInventoryStore(InventoryStore):
+    """Embedded SQLite backend: each mutation is a single-row transaction.
+
+    Triggers stamp every product insert, real change and delete with the next store revision and
+    keep deleted material codes as tombstones, so changes_since() can hand inventory_sync just the
+    products touched after a revision. Revisions written by merge_changes() are remembered as
+    merged, so changes received from another store are never sent back to it.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS products (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            price REAL NOT NULL,
+            material_code TEXT NOT NULL DEFAULT '',
+            revision INTEGER NOT NULL DEFAULT 1
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_products_material_code
+            ON products(material_code) WHERE material_code <> '';
+        CREATE INDEX IF NOT EXISTS idx_products_name ON products(name);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    # Run after SCHEMA, once products is known to have its revision column.
+    CHANGE_TRACKING = """
+        CREATE INDEX IF NOT EXISTS idx_products_revision ON products(revision);
+        CREATE TABLE IF NOT EXISTS deleted_products (
+            material_code TEXT PRIMARY KEY,
+            revision INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_deleted_products_revision ON deleted_products(revision);
+        CREATE TABLE IF NOT EXISTS store_revision (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            revision INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO store_revision (id, revision) VALUES (0, 1);
+        CREATE TABLE IF NOT EXISTS merged_revisions (
+            first INTEGER PRIMARY KEY,
+            last INTEGER NOT NULL
+        );
+        CREATE TRIGGER IF NOT EXISTS products_inserted AFTER INSERT ON products BEGIN
+            UPDATE store_revision SET revision = revision + 1;
+            UPDATE products SET revision = (SELECT revision FROM store_revision) WHERE id = NEW.id;
+            DELETE FROM deleted_products WHERE material_code = NEW.material_code;
+        END;
+        CREATE TRIGGER IF NOT EXISTS products_updated AFTER UPDATE OF name, price, material_code ON products
+            WHEN OLD.name IS NOT NEW.name OR OLD.price IS NOT NEW.price OR OLD.material_code IS NOT NEW.material_code
+        BEGIN
+            UPDATE store_revision SET revision = revision + 1;
+            UPDATE products SET revision = (SELECT revision FROM store_revision) WHERE id = NEW.id;
+            DELETE FROM deleted_products WHERE material_code = NEW.material_code;
+            INSERT OR REPLACE INTO deleted_products (material_code, revision)
+                SELECT OLD.material_code, revision FROM store_revision
+                WHERE OLD.material_code NOT IN ('', NEW.material_code);
+        END;
+        CREATE TRIGGER IF NOT EXISTS products_deleted AFTER DELETE ON products WHEN OLD.material_code <> '' BEGIN
+            UPDATE store_revision SET revision = revision + 1;
+            INSERT OR REPLACE INTO deleted_products (material_code, revision)
+                SELECT OLD.material_code, revision FROM store_revision;
+        END;
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        if "revision" not in [column[1] for column in self._conn.execute("PRAGMA table_info(products)")]:
+            # Inventories from before change tracking: everything already there counts as revision 1.
+            with self._conn:
+                self._conn.execute("ALTER TABLE products ADD COLUMN revision INTEGER NOT NULL DEFAULT 1")
+        self._conn.executescript(self.CHANGE_TRACKING)
+
+    def _row(self, row):
+        return Product(*row) if row else None
+
+    def all(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT id, name, price, material_code FROM products ORDER BY id").fetchall()
+        return [Product(*row) for row in rows]
+
+    def get(self, product_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, name, price, material_code FROM products WHERE id = ?", (product_id,)).fetchone()
+        return self._row(row)
+
+    def find_by_code(self, material_code):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, name, price, material_code FROM products WHERE material_code = ?",
+                (material_code,)).fetchone()
+        return self._row(row)
+
+    def insert(self, name, price, material_code):
+        product = Product(None, name, price, material_code)
+        with self._lock:
+            try:
+                with self._conn:
+                    cursor = self._conn.execute(
+                        "INSERT INTO products (name, price, material_code) VALUES (?, ?, ?)",
+                        (product.name, product.price, product.material_code))
+            except sqlite3.IntegrityError:
+                raise DuplicateMaterialCodeError(material_code) from None
+            self._writes += 1
+        return product.with_id(cursor.lastrowid)
+
+    def update(self, product_id, name, price, material_code):
+        product = Product(product_id, name, price, material_code)
+        with self._lock:
+            try:
+                with self._conn:
+                    cursor = self._conn.execute(
+                        "UPDATE products SET name = ?, price = ?, material_code = ? WHERE id = ?",
+                        (product.name, product.price, product.material_code, product_id))
+            except sqlite3.IntegrityError:
+                raise DuplicateMaterialCodeError(material_code) from None
+            self._writes += 1
+        return product if cursor.rowcount else None
+
+    def delete(self, product_id):
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute("DELETE FROM products WHERE id = ?", (product_id,))
+            self._writes += 1
+        return cursor.rowcount > 0
+
+    def bulk_upsert(self, batches, progress=None):
+        count = lambda: self._conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        done = 0
+        with self._lock:
+            try:
+                with self._conn:
+                    before = count()
+                    for batch in batches:
+                        self._conn.executemany(
+                            "INSERT INTO products (name, price, material_code) VALUES (?, ?, ?)"
+                            " ON CONFLICT(material_code) WHERE material_code <> ''"
+                            " DO UPDATE SET name = excluded.name, price = excluded.price",
+                            [(name, float(price), material_code) for name, price, material_code in batch])
+                        done += len(batch)
+                        if progress is not None:
+                            progress(done)
+                    inserted = count() - before
+            finally:
+                self._writes += 1
+        return inserted, done - inserted
+
+    # Change tracking (see inventory_sync)
+    def revision(self):
+        with self._lock:
+            return self._conn.execute("SELECT revision FROM store_revision").fetchone()[0]
+
+    def changes_since(self, revision):
+        """(current revision, products changed after `revision`, material codes deleted after it).
+
+        Products without a material code cannot be matched up in another store and are left out,
+        and so is anything whose latest change came from merge_changes(): echoing it back would
+        undo newer edits at the store it came from. Anything committed while this runs has a newer
+        revision and waits for the next call.
+        """
+        # The nearest merged range starting at or before a revision is the only one that can hold it.
+        local = ("COALESCE((SELECT last FROM merged_revisions WHERE first <= {0}.revision"
+                 " ORDER BY first DESC LIMIT 1), 0) < {0}.revision")
+        with self._lock:
+            current = self._conn.execute("SELECT revision FROM store_revision").fetchone()[0]
+            rows = self._conn.execute(
+                "SELECT id, name, price, material_code FROM products WHERE revision > ? AND revision <= ?"
+                f" AND material_code <> '' AND {local.format('products')} ORDER BY revision",
+                (revision, current)).fetchall()
+            deleted = self._conn.execute(
+                "SELECT material_code FROM deleted_products WHERE revision > ? AND revision <= ?"
+                f" AND {local.format('deleted_products')} ORDER BY revision",
+                (revision, current)).fetchall()
+        return current, [Product(*row) for row in rows], [code for code, in deleted]
+
+    def merge_changes(self, products, deleted_codes, meta=None):
+        """Upsert products and delete material codes by code, plus `meta` entries, in one transaction.
+
+        Products that already hold the same name and price are left alone, so merging the same
+        changes twice writes nothing the second time. The revisions the merge writes are recorded
+        in merged_revisions (see changes_since). Returns (inserted, updated, deleted).
+        """
+        revision = "SELECT revision FROM store_revision"
+        inserted = updated = deleted = 0
+        with self._lock:
+            try:
+                with self._conn:
+                    # IMMEDIATE keeps other connections from writing until we commit, so every
+                    # revision between first and last below comes from this merge.
+                    self._conn.execute("BEGIN IMMEDIATE")
+                    first = self._conn.execute(revision).fetchone()[0] + 1
+                    for product in products:
+                        # `<> ''` lets SQLite use the partial unique index on material_code.
+                        row = self._conn.execute(
+                            "SELECT id, name, price FROM products WHERE material_code = ? AND material_code <> ''",
+                            (product.material_code,)).fetchone()
+                        if row is None:
+                            self._conn.execute("INSERT INTO products (name, price, material_code) VALUES (?, ?, ?)",
+                                               (product.name, product.price, product.material_code))
+                            inserted += 1
+                        elif row[1:] != (product.name, product.price):
+                            self._conn.execute("UPDATE products SET name = ?, price = ? WHERE id = ?",
+                                               (product.name, product.price, row[0]))
+                            updated += 1
+                    for code in deleted_codes:
+                        deleted += self._conn.execute(
+                            "DELETE FROM products WHERE material_code = ? AND material_code <> ''", (code,)).rowcount
+                    last = self._conn.execute(revision).fetchone()[0]
+                    if last >= first:
+                        self._conn.execute("INSERT INTO merged_revisions (first, last) VALUES (?, ?)", (first, last))
+                    for key, value in (meta or {}).items():
+                        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+            finally:
+                self._writes += 1
+        return inserted, updated, deleted
+
+    def insert_many(self, rows, meta=None):
+        """Insert (name, price, material_code) rows plus `meta` entries in one transaction."""
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany("INSERT INTO products (name, price, material_code) VALUES (?, ?, ?)", rows)
+                    for key, value in (meta or {}).items():
+                        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+            finally:
+                self._writes += 1
+
+    def version(self):
+        # data_version only moves for commits made by other connections, so pair it with our own counter.
+        with self._lock:
+            return self._writes, self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def get_meta(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def meta_items(self, prefix):
+        """(key, value) for every meta key starting with prefix, in key order."""
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value FROM meta WHERE substr(key, 1, ?) = ? ORDER BY key",
+                                      (len(prefix), prefix)).fetchall()
+        return rows
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# --- Change Events ---
+INSERTED = "inserted"
+UPDATED = "updated"
+REMOVED = "removed"
+RESET = "reset"
+
+# `row` is the product's position in InventoryRepository.products() (before removal for REMOVED);
+# RESET carries neither row nor product and means "re-read everything".
+InventoryChange = namedtuple("InventoryChange", ["kind", "row", "product"])
+
+
+# --- Cached Repository ---
+class InventoryRepository:
+    """Process-wide in-memory view of a store, shared by every screen.
+
+    The product list is parsed once per real change: reads only compare the store's version
+    token, and our own writes patch the cached list in place. The returned list is shared and
+    must not be mutated by callers. Subscribers receive an InventoryChange after every write,
+    and a RESET when a change made outside this process is picked up.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._products = None
+        self._by_id = {}
+        self._rows = {}  # id -> last known position in _products (see _row)
+        self._version = None
+        self._loaded = False
+        self._importing = False
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, change):
+        for listener in list(self._listeners):
+            listener(change)
+
+    def _refresh(self):
+        """Reload if the store moved on; returns True when listeners must be told to reset."""
+        version = self.store.version()
+        if self._products is not None and version == self._version:
+            return False
+        self._products = self.store.all()
+        self._by_id = {p.id: p for p in self._products}
+        self._rows = {p.id: row for row, p in enumerate(self._products)}
+        self._version = version
+        reset = self._loaded
+        self._loaded = True
+        return reset
+
+    # Cache patching; each returns the row it touched.
+    def _append(self, product):
+        row = len(self._products)
+        self._products.append(product)
+        self._by_id[product.id] = product
+        self._rows[product.id] = row
+        return row
+
+    def _row(self, product_id):
+        # Products only ever move up, one row per earlier delete, so walk back from the last known
+        # position comparing by identity; a long walk means many deletes, so re-index then.
+        product = self._by_id[product_id]
+        known = row = min(self._rows[product_id], len(self._products) - 1)
+        while self._products[row] is not product:
+            row -= 1
+        if known - row > 64:
+            self._rows = {p.id: i for i, p in enumerate(self._products)}
+        else:
+            self._rows[product_id] = row
+        return row
+
+    def _replace(self, product):
+        row = self._row(product.id)
+        self._products[row] = product
+        self._by_id[product.id] = product
+        return row
+
+    def _remove(self, product_id):
+        row = self._row(product_id)
+        del self._products[row]
+        del self._by_id[product_id]
+        del self._rows[product_id]
+        return row
+
+    def _after_write(self, version_before, change):
+        # Only keep the patched cache if nobody else changed the store in between.
+        if version_before == self._version and change.kind != RESET:
+            self._version = self.store.version()
+            return change
+        self._products = None
+        self._refresh()
+        return InventoryChange(RESET, None, None)
+
+    def _write(self, apply):
+        """Run one store mutation under the lock and notify subscribers; returns the applied change."""
+        change = notified = None
+        with self._lock:
+            reset = self._refresh()
+            version_before = self.store.version()
+            change = apply()
+            if change is not None:
+                notified = self._after_write(version_before, change)
+        if reset:
+            self._notify(InventoryChange(RESET, None, None))
+        if notified is not None:
+            self._notify(notified)
+        return change
+
+    def products(self):
+        with self._lock:
+            reset = self._refresh()
+            products = self._products
+        if reset:
+            self._notify(InventoryChange(RESET, None, None))
+        return products
+
+    def refresh(self):
+        """Pick up changes made outside this process, notifying subscribers if there were any."""
+        self.products()
+
+    def get(self, product_id):
+        self.products()
+        return self._by_id.get(product_id)
+
+    def add(self, name, price, material_code):
+        def apply():
+            product = self.store.insert(name, price, material_code)
+            return InventoryChange(INSERTED, self._append(product), product)
+        return self._write(apply).product
+
+    def update(self, product_id, name, price, material_code):
+        def apply():
+            product = self.store.update(product_id, name, price, material_code)
+            old = self._by_id.get(product_id)
+            if product is None:
+                return None
+            if old is None:
+                return InventoryChange(RESET, None, product)
+            return InventoryChange(UPDATED, self._replace(product), product)
+        change = self._write(apply)
+        return change.product if change is not None else None
+
+    def delete(self, product_id):
+        def apply():
+            deleted = self.store.delete(product_id)
+            old = self._by_id.get(product_id)
+            if not deleted:
+                return None
+            if old is None:
+                return InventoryChange(RESET, None, None)
+            return InventoryChange(REMOVED, self._remove(product_id), old)
+        return self._write(apply) is not None
+
+    def bulk_upsert(self, batches, progress=None):
+        """Store.bulk_upsert under the repository lock; safe to call from a worker thread.
+
+        Subscribers are not called here. They get a single RESET from the next products() or
+        refresh(), which the owning (GUI) thread should call once the import is done.
+        """
+        with self._lock:
+            self._importing = True
+            try:
+                return self.store.bulk_upsert(batches, progress)
+            finally:
+                self._products = None
+                self._by_id = {}
+                self._rows = {}
+                self._importing = False
+
+    def apply_external(self, change):
+        """Patch the cache with a change the store pushed (another counter's edit) and pass it on.
+
+        Pushes may repeat our own writes, so applying the same change twice is a no-op. A RESET
+        always reloads: patching an earlier push may already have recorded the store's new version.
+        Pushes arriving during bulk_upsert are dropped rather than waiting for it (on the GUI
+        thread): the import empties the cache, and the reload after it includes them.
+        """
+        if self._importing:
+            return
+        while not self._lock.acquire(timeout=0.05):  # an import may start while we wait
+            if self._importing:
+                return
+        try:
+            if change.kind == RESET or self._products is None:
+                self._products = None
+                notified = InventoryChange(RESET, None, None) if self._refresh() else None
+            else:
+                notified = self._patch(change.kind, change.product)
+                self._version = self.store.version()
+        finally:
+            self._lock.release()
+        if notified is not None:
+            self._notify(notified)
+
+    def _patch(self, kind, product):
+        old = self._by_id.get(product.id)
+        if kind == REMOVED:
+            if old is None:
+                return None
+            return InventoryChange(REMOVED, self._remove(product.id), old)
+        if old is None:
+            return InventoryChange(INSERTED, self._append(product), product)
+        if old == product:
+            return None
+        return InventoryChange(UPDATED, self._replace(product), product)
+
+
+# --- Migration ---
+def migrate_json_inventory(json_path, store):
+    """Copy a legacy inventory.json into a SQLite store once. Returns the number of products imported."""
+    if store.get_meta("migrated_from_json") or not os.path.exists(json_path):
+        return 0
+    try:
+        # Going through the JSON store also picks up records still sitting in its journal.
+        json_store = JsonInventoryStore(json_path)
+    except InventoryCorruptError:
+        logging.exception("Skipping migration of unreadable %s", json_path)
+        return 0
+    try:
+        records = json_store.all()
+    finally:
+        json_store.close()
+
+    # Later entries win when the legacy file repeats a material code; order is otherwise kept.
+    rows = {}
+    for i, product in enumerate(records):
+        code = product.material_code
+        rows[code or ("", i)] = (product.name, product.price, code)
+
+    store.insert_many(list(rows.values()), {"migrated_from_json": json_path})
+    logging.info("Migrated %d products from %s to %s", len(rows), json_path, store.path)
+    return len(rows)
+
+
+def open_inventory_store(backend, json_path, db_path):
+    if backend == "json":
+        return JsonInventoryStore(json_path)
+    if backend == "sqlite":
+        store = SqliteInventoryStore(db_path)
+        migrate_json_inventory(json_path, store)
+        return store
+    raise ValueError(f"Unknown inventory backend: {backend}")
@@ -0,0 +1,208 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+import uuid
+from collections import namedtuple
+
+from models import Product
+
+# --- Inventory Delta Sync ---
+# Branch machines keep their own inventory and exchange delta files: gzip-compressed JSON Lines
+# holding only the products added, changed or removed since a revision of the sending store,
+# keyed by material code. The first line is a header whose sha256 covers every line after it:
+#
+#   {"format": "globizz-inventory-delta", "version": 1, "source": "<store id>", "base": 120,
+#    "revision": 164, "puts": 1, "deletes": 1, "sha256": "..."}
+#   {"put": {"material_code": "MC1", "name": "Steel Bolt", "price": 12.5}}
+#   {"delete": "MC7"}
+#
+# The receiving store remembers the last source revision it applied, so applying a delta twice
+# (or an older one after a newer one) changes nothing, and a delta that starts past that revision
+# is refused rather than leaving a gap. Products are only ever touched by material code: local
+# additions with other codes survive.
+#
+# A delta carries only changes made on the exporting inventory. Products it merged from other
+# branches are left out until they are edited locally, so a price received from HQ is never
+# sent back to HQ over a newer one; each branch applies the deltas of every branch it follows.
+
+FORMAT = "globizz-inventory-delta"
+FORMAT_VERSION = 1
+
+HEADER_FIELDS = {"source": str, "base": int, "revision": int, "puts": int, "deletes": int, "sha256": str}
+
+ApplyResult = namedtuple("ApplyResult", ["inserted", "updated", "deleted", "skipped"])
+
+def _tracked(store):
+    if not hasattr(store, "changes_since"):
+        raise ValueError("Delta sync needs the SQLite inventory backend")
+    return store
+
+def store_id(store):
+    """This store's sync identity, created on first use; deltas name the store they came from."""
+    identity = _tracked(store).get_meta("sync_id")
+    if identity is None:
+        identity = uuid.uuid4().hex
+        store.set_meta("sync_id", identity)
+    return identity
+
+def applied_revision(store, source):
+    """The last revision of `source` applied to this store (0 if none)."""
+    return int(store.get_meta(f"sync_applied:{source}", 0))
+
+def applied_sources(store):
+    """[(source store id, last revision applied)] for every store this one has taken deltas from."""
+    return [(key.split(":", 1)[1], int(value)) for key, value in _tracked(store).meta_items("sync_applied:")]
+
+# --- Export ---
+def export_delta(store, directory, since=None):
+    """Write the changes after revision `since` to a delta file in `directory`.
+
+    `since` defaults to the revision the previous export reached; 0 exports every product.
+    Returns (path, header).
+    """
+    source = store_id(store)
+    if since is None:
+        since = int(store.get_meta("sync_exported", 0))
+    revision, products, deleted = store.changes_since(since)
+    lines = [json.dumps({"put": {"material_code": p.material_code, "name": p.name, "price": p.price}},
+                        separators=(",", ":")).encode() + b"\n" for p in products]
+    lines += [json.dumps({"delete": code}, separators=(",", ":")).encode() + b"\n" for code in deleted]
+    digest = hashlib.sha256()
+    for line in lines:
+        digest.update(line)
+    header = {"format": FORMAT, "version": FORMAT_VERSION, "source": source, "base": since,
+              "revision": revision, "puts": len(products), "deletes": len(deleted), "sha256": digest.hexdigest()}
+
+    name = f"inventory-delta-{source[:8]}-{since}-{revision}-{header['sha256'][:12]}.jsonl.gz"
+    path = os.path.join(directory, name)
+    temp_path = path + ".tmp"
+    with gzip.open(temp_path, "wb") as file:
+        file.write(json.dumps(header).encode() + b"\n")
+        file.writelines(lines)
+    os.replace(temp_path, path)
+    store.set_meta("sync_exported", revision)
+    return path, header
+
+# --- Apply ---
+def read_delta(path):
+    """(header, products, deleted codes) from a delta file, after checking its format and hash."""
+    try:
+        with gzip.open(path, "rb") as file:
+            header = json.loads(file.readline())
+            lines = file.readlines()
+    except (OSError, EOFError, ValueError) as e:
+        raise ValueError(f"{path} is not a readable inventory delta: {e}") from None
+    if not isinstance(header, dict) or header.get("format") != FORMAT:
+        raise ValueError(f"{path} is not an inventory delta")
+    if header.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{path} uses delta format {header.get('version')}, expected {FORMAT_VERSION}")
+    for field, kind in HEADER_FIELDS.items():
+        value = header.get(field)
+        # bool is an int subclass, but never a valid revision or count.
+        if not isinstance(value, kind) or isinstance(value, bool):
+            raise ValueError(f"{path} has a missing or invalid '{field}' in its header")
+    digest = hashlib.sha256()
+    for line in lines:
+        digest.update(line)
+    if digest.hexdigest() != header["sha256"]:
+        raise ValueError(f"{path} is damaged or incomplete (content hash mismatch)")
+
+    products, deleted = [], []
+    try:
+        for line in lines:
+            record = json.loads(line)
+            if "put" in record:
+                put = record["put"]
+                products.append(Product(None, put["name"], put["price"], put["material_code"]))
+            else:
+                deleted.append(record["delete"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"{path} holds a malformed record: {e!r}") from None
+    if len(products) != header["puts"] or len(deleted) != header["deletes"]:
+        raise ValueError(f"{path} does not hold the {header['puts']} changes and {header['deletes']} removals "
+                         f"its header lists")
+    return header, products, deleted
+
+def apply_delta(store, path):
+    """Merge a delta file into the store; returns an ApplyResult.
+
+    Raises ValueError for a damaged file, a delta exported from this same store, or one that
+    skips changes this store has not seen yet.
+    """
+    header, products, deleted = read_delta(path)
+    source = header["source"]
+    if source == store_id(store):
+        raise ValueError(f"{path} was exported from this inventory")
+    applied = applied_revision(store, source)
+    if header["revision"] <= applied:
+        return ApplyResult(0, 0, 0, True)
+    if header["base"] > applied:
+        raise ValueError(f"{path} holds changes from revision {header['base']} of inventory {source[:8]}, but only "
+                         f"{applied} have been applied here; export it again with --since {applied}")
+    inserted, updated, removed = store.merge_changes(products, deleted, {f"sync_applied:{source}": header["revision"]})
+    return ApplyResult(inserted, updated, removed, False)
+
+def _delta_order(path):
+    # Several files from one source are applied oldest first; unreadable ones sort first and
+    # report their error when applied.
+    try:
+        with gzip.open(path, "rb") as file:
+            header = json.loads(file.readline())
+        return header["source"], header["revision"]
+    except (OSError, EOFError, ValueError, KeyError, TypeError):
+        return "", 0
+
+# --- Entry Point ---
+def main(argv=None):
+    from inventory_store import open_inventory_store
+
+    parser = argparse.ArgumentParser(description="Exchange inventory changes between branches as delta files.")
+    parser.add_argument("--json", default="inventory.json", help="JSON inventory to migrate (default: %(default)s)")
+    parser.add_argument("--db", default="inventory.db", help="SQLite inventory (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="show this inventory's id, revision and what it has applied")
+    export = commands.add_parser("export", help="write the changes since a revision to a delta file")
+    export.add_argument("--since", type=int, help="source revision to start after (default: the last export)")
+    export.add_argument("--full", action="store_true", help="export every product (same as --since 0)")
+    export.add_argument("--out", default=".", help="directory for the delta file (default: current directory)")
+    apply = commands.add_parser("apply", help="merge delta files from another branch into this inventory")
+    apply.add_argument("paths", nargs="+", help="delta files, applied oldest first")
+    args = parser.parse_args(argv)
+
+    store = open_inventory_store("sqlite", args.json, args.db)
+    started = time.perf_counter()
+    try:
+        if args.command == "status":
+            print(f"Inventory {store_id(store)} at revision {store.revision()}, "
+                  f"last exported {store.get_meta('sync_exported', 0)}")
+            for source, revision in applied_sources(store):
+                print(f"  applied {source} up to revision {revision}")
+            return 0
+        if args.command == "export":
+            path, header = export_delta(store, args.out, 0 if args.full else args.since)
+            print(f"Wrote {path}: {header['puts']} changed, {header['deletes']} removed "
+                  f"(revisions {header['base']}-{header['revision']}) in {time.perf_counter() - started:.2f}s")
+            return 0
+        status = 0
+        for path in sorted(args.paths, key=_delta_order):
+            try:
+                result = apply_delta(store, path)
+            except ValueError as e:
+                print(e, file=sys.stderr)
+                status = 1
+                continue
+            if result.skipped:
+                print(f"{path}: already applied")
+            else:
+                print(f"{path}: {result.inserted} added, {result.updated} updated, {result.deleted} removed")
+        print(f"Done in {time.perf_counter() - started:.2f}s")
+        return status
+    finally:
+        store.close()
+
+if __name__ == '__main__':
+    sys.exit(main())
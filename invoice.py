@@ -0,0 +1,33 @@
+import os
+import time
+from collections import namedtuple
+
+from cart import FREIGHT_RATE, Cart, CartLine, format_rate
+
+# --- Invoice Data ---
+BILLINGS_FOLDER = os.path.join(os.path.expanduser("~/Desktop"), "globizz-app-billings")
+
+# Immutable snapshot of a bill, safe to hand to the rendering thread. Money is in paise;
+# `totals` is the cart's CartTotals, so the PDF prints exactly what the billing screen showed.
+InvoiceLine = namedtuple("InvoiceLine", ["name", "qty", "price", "gst_rate", "total"])
+Invoice = namedtuple("Invoice", ["order_no", "billed_to", "date", "lines", "totals"])
+
+def invoice_from_cart(order_no, billed_to, date, cart):
+    lines = tuple(InvoiceLine(line.name, line.qty, line.price, line.gst_rate, line.total) for line in cart)
+    return Invoice(order_no, billed_to, date, lines, cart.totals())
+
+def summary_rows(totals):
+    """(label, paise) rows of the bill summary, one GST row per slab that was charged."""
+    rows = [("Net Total", totals.net_total), (f"Freight ({format_rate(FREIGHT_RATE)}%)", totals.freight)]
+    taxed = [slab for slab in totals.slabs if slab.rate]
+    rows += [(f"GST ({format_rate(slab.rate)}%)", slab.gst) for slab in taxed] or [("GST (0%)", 0)]
+    rows.append(("Gross Total", totals.gross_total))
+    return rows
+
+def invoice_from_dict(order):
+    """Build an Invoice from plain data, e.g. one line of a batch JSONL file."""
+    cart = Cart(CartLine(line.get("product_id"), line["name"], line.get("material_code", ""),
+                         int(line["qty"]), line["price"], line.get("gst_rate", 0))
+                for line in order["lines"])
+    return invoice_from_cart(order["order_no"], order["billed_to"],
+                             order.get("date") or time.strftime('%d %B %Y'), cart)
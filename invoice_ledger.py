@@ -0,0 +1,354 @@
+import argparse
+import calendar
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import namedtuple
+from datetime import date as Date, timedelta
+from decimal import Decimal
+
+from cart import FREIGHT_RATE, Cart, CartLine, apply_rate, format_rupees
+from invoice import BILLINGS_FOLDER, invoice_from_cart
+
+# --- Invoice Ledger ---
+# Every bill is recorded here before its PDF is rendered, so past invoices can be found and
+# reprinted from structured data. Money is stored in paise, rates as decimal strings.
+#
+# record() also keeps per-day and per-month rollups up to date in the same transaction: sales
+# totals, GST per slab and quantities per product. Reports read those instead of the bills.
+
+LedgerEntry = namedtuple("LedgerEntry", ["order_no", "billed_to", "date", "gross_total"])
+
+# Rollup tables and their value columns (after grain, period and the key columns).
+ROLLUPS = {
+    "sales_rollup": ((), ("invoices", "net_total", "freight", "gst", "gross_total")),
+    "gst_rollup": (("gst_rate",), ("net", "freight", "gst")),
+    "product_rollup": (("product",), ("qty", "net", "total")),  # product: rollup_products.id
+}
+
+def _month_end(day):
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+def rollup_ranges(day_from=None, day_to=None):
+    """Split an inclusive 'YYYY-MM-DD' range into [(grain, first, last)] covering it exactly.
+
+    Whole months are read from the month rollups, the days either side from the day rollups.
+    """
+    day_from = day_from or "0001-01-01"
+    day_to = day_to or "9999-12-31"
+    first, last = Date.fromisoformat(day_from), Date.fromisoformat(day_to)
+    first_month = first if first.day == 1 else _month_end(first) + timedelta(days=1)
+    last_month = last if last == _month_end(last) else last.replace(day=1) - timedelta(days=1)
+    if first_month > last_month:
+        return [("day", day_from, day_to)]
+    ranges = []
+    if first < first_month:
+        ranges.append(("day", day_from, (first_month - timedelta(days=1)).isoformat()))
+    ranges.append(("month", first_month.isoformat()[:7], last_month.isoformat()[:7]))
+    if last_month < last:
+        ranges.append(("day", (last_month + timedelta(days=1)).isoformat(), day_to))
+    return ranges
+
+class InvoiceLedger:
+    """SQLite archive of issued invoices, indexed by order number, customer, day and material code."""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS invoices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_no TEXT UNIQUE,
+            billed_to TEXT NOT NULL COLLATE NOCASE,
+            date TEXT NOT NULL,
+            day TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            net_total INTEGER NOT NULL,
+            freight INTEGER NOT NULL,
+            gst INTEGER NOT NULL,
+            gross_total INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_invoices_billed_to ON invoices(billed_to, id);
+        CREATE INDEX IF NOT EXISTS idx_invoices_day ON invoices(day, id);
+        CREATE TABLE IF NOT EXISTS invoice_lines (
+            invoice_id INTEGER NOT NULL REFERENCES invoices(id),
+            line_no INTEGER NOT NULL,
+            product_id INTEGER,
+            name TEXT NOT NULL,
+            material_code TEXT NOT NULL DEFAULT '',
+            qty INTEGER NOT NULL,
+            price INTEGER NOT NULL,
+            gst_rate TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            PRIMARY KEY (invoice_id, line_no)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_invoice_lines_material_code
+            ON invoice_lines(material_code, invoice_id);
+        CREATE TABLE IF NOT EXISTS sales_rollup (
+            grain TEXT NOT NULL,
+            period TEXT NOT NULL,
+            invoices INTEGER NOT NULL,
+            net_total INTEGER NOT NULL,
+            freight INTEGER NOT NULL,
+            gst INTEGER NOT NULL,
+            gross_total INTEGER NOT NULL,
+            PRIMARY KEY (grain, period)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS gst_rollup (
+            grain TEXT NOT NULL,
+            period TEXT NOT NULL,
+            gst_rate TEXT NOT NULL,
+            net INTEGER NOT NULL,
+            freight INTEGER NOT NULL,
+            gst INTEGER NOT NULL,
+            PRIMARY KEY (grain, period, gst_rate)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS rollup_products (
+            id INTEGER PRIMARY KEY,
+            material_code TEXT NOT NULL,
+            name TEXT NOT NULL,
+            UNIQUE (material_code, name)
+        );
+        CREATE TABLE IF NOT EXISTS product_rollup (
+            grain TEXT NOT NULL,
+            period TEXT NOT NULL,
+            product INTEGER NOT NULL REFERENCES rollup_products(id),
+            qty INTEGER NOT NULL,
+            net INTEGER NOT NULL,
+            total INTEGER NOT NULL,
+            PRIMARY KEY (grain, period, product)
+        ) WITHOUT ROWID;
+    """
+    SCHEMA_VERSION = 1  # 1: rollup tables
+
+    ORDER_PREFIX = "ORD"
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < self.SCHEMA_VERSION:
+            # Ledgers written before the rollups existed get them filled in once.
+            self.rebuild_rollups()
+            self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def record(self, billed_to, cart, when=None):
+        """Store the cart as a new invoice and return it with a freshly issued order number.
+
+        Order numbers come from the AUTOINCREMENT row id, so they are unique and only ever grow,
+        even across app instances sharing the ledger file.
+        """
+        when = time.localtime() if when is None else when
+        date = time.strftime('%d %B %Y', when)
+        day = time.strftime('%Y-%m-%d', when)
+        totals = cart.totals()
+        products = {}
+        for line in cart:
+            qty, net, total = products.get((line.material_code, line.name), (0, 0, 0))
+            products[line.material_code, line.name] = (qty + line.qty, net + line.net, total + line.total)
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    "INSERT INTO invoices (billed_to, date, day, created_at, net_total, freight, gst, gross_total)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (billed_to, date, day, time.mktime(when),
+                     totals.net_total, totals.freight, totals.gst, totals.gross_total))
+                invoice_id = cursor.lastrowid
+                order_no = f"{self.ORDER_PREFIX}{invoice_id:08d}"
+                self._conn.execute("UPDATE invoices SET order_no = ? WHERE id = ?", (order_no, invoice_id))
+                self._conn.executemany(
+                    "INSERT INTO invoice_lines (invoice_id, line_no, product_id, name, material_code, qty, price,"
+                    " gst_rate, total) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(invoice_id, i, line.product_id, line.name, line.material_code, line.qty, line.price,
+                      str(line.gst_rate), line.total) for i, line in enumerate(cart)])
+                self._add_to_rollups(
+                    day, [(1, totals.net_total, totals.freight, totals.gst, totals.gross_total)],
+                    [(str(slab.rate), slab.net, slab.freight, slab.gst) for slab in totals.slabs],
+                    [(product,) + value for product, value in zip(self._product_ids(products), products.values())])
+        return invoice_from_cart(order_no, billed_to, date, cart)
+
+    def get(self, order_no):
+        """The stored Invoice for order_no, or None. Totals are recomputed from the stored lines."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, billed_to, date FROM invoices WHERE order_no = ?", (order_no,)).fetchone()
+            if row is None:
+                return None
+            invoice_id, billed_to, date = row
+            lines = self._conn.execute(
+                "SELECT product_id, name, material_code, qty, price, gst_rate FROM invoice_lines"
+                " WHERE invoice_id = ? ORDER BY line_no", (invoice_id,)).fetchall()
+        cart = Cart(CartLine(product_id, name, material_code, qty, Decimal(price) / 100, gst_rate)
+                    for product_id, name, material_code, qty, price, gst_rate in lines)
+        return invoice_from_cart(order_no, billed_to, date, cart)
+
+    def find(self, customer=None, day_from=None, day_to=None, material_code=None, limit=100):
+        """Newest-first LedgerEntry rows matching every given filter.
+
+        customer matches case-insensitively by prefix; days are 'YYYY-MM-DD' and inclusive.
+        """
+        clauses, params = [], []
+        if customer:
+            clauses.append("billed_to >= ? AND billed_to < ?")
+            params += [customer, customer + "\U0010ffff"]
+        if day_from:
+            clauses.append("day >= ?")
+            params.append(day_from)
+        if day_to:
+            clauses.append("day <= ?")
+            params.append(day_to)
+        if material_code:
+            clauses.append("id IN (SELECT invoice_id FROM invoice_lines WHERE material_code = ?)")
+            params.append(material_code)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT order_no, billed_to, date, gross_total FROM invoices{where} ORDER BY id DESC LIMIT ?",
+                params + [limit]).fetchall()
+        return [LedgerEntry(*row) for row in rows]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM invoices").fetchone()[0]
+
+    # Rollups
+    def _product_ids(self, keys):
+        """rollup_products ids for (material_code, name) pairs, adding new ones. Call inside a transaction."""
+        keys = list(keys)
+        self._conn.executemany("INSERT OR IGNORE INTO rollup_products (material_code, name) VALUES (?, ?)", keys)
+        return [self._conn.execute("SELECT id FROM rollup_products WHERE material_code = ? AND name = ?",
+                                   key).fetchone()[0] for key in keys]
+
+    def product_names(self, ids):
+        """{id: (material_code, name)} for rollup product ids."""
+        ids = list(ids)
+        with self._lock:
+            return {row[0]: row[1:] for row in self._conn.execute(
+                f"SELECT id, material_code, name FROM rollup_products WHERE id IN ({', '.join('?' * len(ids))})",
+                ids)}
+
+    def _add_to_rollups(self, day, sales, slabs, products):
+        """Add one day's amounts to its day and month rollup rows. Call inside a transaction."""
+        for table, rows in (("sales_rollup", sales), ("gst_rollup", slabs), ("product_rollup", products)):
+            keys, values = ROLLUPS[table]
+            columns = ("grain", "period") + keys + values
+            self._conn.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+                f" ON CONFLICT({', '.join(columns[:2 + len(keys)])}) DO UPDATE SET "
+                + ", ".join(f"{column} = {column} + excluded.{column}" for column in values),
+                [(grain, period) + tuple(row) for grain, period in (("day", day), ("month", day[:7]))
+                 for row in rows])
+
+    def rebuild_rollups(self):
+        """Recompute every rollup from the stored bills, e.g. after editing the ledger by hand."""
+        with self._lock:
+            with self._conn:
+                for table in ROLLUPS:
+                    self._conn.execute(f"DELETE FROM {table}")
+                sales = self._conn.execute(
+                    "SELECT day, COUNT(*), SUM(net_total), SUM(freight), SUM(gst), SUM(gross_total)"
+                    " FROM invoices GROUP BY day").fetchall()
+                # Freight and GST are rounded per bill and slab, so the slab amounts are redone per bill.
+                slabs = {}
+                for day, rate, net in self._conn.execute(
+                        "SELECT i.day, l.gst_rate, SUM(l.price * l.qty) FROM invoice_lines l"
+                        " JOIN invoices i ON i.id = l.invoice_id GROUP BY l.invoice_id, l.gst_rate"):
+                    freight = apply_rate(net, FREIGHT_RATE)
+                    gst = apply_rate(net + freight, Decimal(rate))
+                    totals = slabs.setdefault(day, {}).get(rate, (0, 0, 0))
+                    slabs[day][rate] = (totals[0] + net, totals[1] + freight, totals[2] + gst)
+                products = {}
+                for day, material_code, name, qty, net, total in self._conn.execute(
+                        "SELECT i.day, l.material_code, l.name, SUM(l.qty), SUM(l.price * l.qty), SUM(l.total)"
+                        " FROM invoice_lines l JOIN invoices i ON i.id = l.invoice_id"
+                        " GROUP BY i.day, l.material_code, l.name"):
+                    products.setdefault(day, {})[material_code, name] = (qty, net, total)
+                for day, *totals in sales:
+                    day_products = products.get(day, {})
+                    self._add_to_rollups(day, [totals],
+                                         [(rate,) + amounts for rate, amounts in slabs.get(day, {}).items()],
+                                         [(product,) + amounts for product, amounts in
+                                          zip(self._product_ids(day_products), day_products.values())])
+
+    def rollups(self, table, day_from=None, day_to=None, by_day=False):
+        """Rollup rows (period, *keys, *values) covering an inclusive day range.
+
+        Whole months come back as one 'YYYY-MM' row per key, unless by_day asks for day rows.
+        """
+        keys, values = ROLLUPS[table]
+        ranges = [("day", day_from or "0001-01-01", day_to or "9999-12-31")] if by_day else \
+            rollup_ranges(day_from, day_to)
+        query = " UNION ALL ".join(
+            f"SELECT {', '.join(('period',) + keys + values)} FROM {table}"
+            " WHERE grain = ? AND period BETWEEN ? AND ?" for _ in ranges)
+        with self._lock:
+            return self._conn.execute(query, [value for r in ranges for value in r]).fetchall()
+
+def reprint(ledger, order_no, filename, progress=None):
+    """Render a stored invoice again. Returns False if the order is not in the ledger."""
+    invoice = ledger.get(order_no)
+    if invoice is None:
+        return False
+    from invoice_pdf import build_invoice_pdf
+    build_invoice_pdf(invoice, filename, progress)
+    return True
+
+# --- Entry Point ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Look up and reprint invoices from the ledger.")
+    parser.add_argument("--db", default="invoices.db", help="ledger database (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    find = commands.add_parser("find", help="list invoices, newest first")
+    find.add_argument("--customer", help="billed-to name or its beginning")
+    find.add_argument("--from", dest="day_from", help="first day, YYYY-MM-DD")
+    find.add_argument("--to", dest="day_to", help="last day, YYYY-MM-DD")
+    find.add_argument("--code", dest="material_code", help="material code billed on the invoice")
+    find.add_argument("--limit", type=int, default=50)
+
+    show = commands.add_parser("show", help="print one invoice")
+    show.add_argument("order_no")
+
+    again = commands.add_parser("reprint", help="render an invoice's PDF again")
+    again.add_argument("order_no")
+    again.add_argument("-o", "--out", help=f"output PDF (default: <order_no>.pdf in {BILLINGS_FOLDER})")
+    args = parser.parse_args(argv)
+
+    ledger = InvoiceLedger(args.db)
+    started = time.perf_counter()
+    try:
+        if args.command == "find":
+            entries = ledger.find(args.customer, args.day_from, args.day_to, args.material_code, args.limit)
+            for entry in entries:
+                print(f"{entry.order_no}  {entry.date:<18}  Rs {format_rupees(entry.gross_total):>12}  {entry.billed_to}")
+            print(f"{len(entries)} invoice(s) in {(time.perf_counter() - started) * 1000:.1f} ms")
+        elif args.command == "show":
+            invoice = ledger.get(args.order_no)
+            if invoice is None:
+                print(f"No invoice {args.order_no}", file=sys.stderr)
+                return 1
+            print(f"{invoice.order_no}  {invoice.date}  {invoice.billed_to}")
+            for i, line in enumerate(invoice.lines, 1):
+                print(f"  {i:>3}. {line.name}  x{line.qty}  Rs {format_rupees(line.price)}  Rs {format_rupees(line.total)}")
+            print(f"  Gross Total: Rs {format_rupees(invoice.totals.gross_total)}")
+        else:
+            filename = args.out
+            if filename is None:
+                os.makedirs(BILLINGS_FOLDER, exist_ok=True)
+                filename = os.path.join(BILLINGS_FOLDER, f"{args.order_no}.pdf")
+            if not reprint(ledger, args.order_no, filename):
+                print(f"No invoice {args.order_no}", file=sys.stderr)
+                return 1
+            print(f"Reprinted {args.order_no} to {filename} in {(time.perf_counter() - started) * 1000:.1f} ms")
+    finally:
+        ledger.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,330 @@
+import threading
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Flowable
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+from cart import format_rupees
+from invoice import summary_rows
+
+# --- Invoice Rendering ---
+COMPANY_NAME = "Globizz Solutions"
+COMPANY_DETAILS = (
+    "Address: G.T.B. Nagar,Ludhiana - 141015 (Punjab)",
+    "Mail: sanjiv@globizzsolutions.com, globizzsolutions@gmail.com",
+    "Phone: 98728-71664, 9915700364, 0161-4100361",
+)
+
+def _progress_reporter(progress):
+    state = {"size": 0}
+    def report(kind, value):
+        if kind == "SIZE_EST":
+            state["size"] = value
+        elif kind == "PROGRESS" and state["size"]:
+            progress(min(99, int(100 * value / state["size"])))
+    return report
+
+class StaticHeader(Flowable):
+    """Order-independent block of flowables, laid out once and stamped into each document as a form XObject.
+
+    The wrapped layout is cached on the instance, so a StaticHeader must not be drawn from two
+    threads at once; each process or rendering thread should use its own InvoiceTemplate.
+    """
+
+    FORM_NAME = "InvoiceStaticHeader"
+
+    def __init__(self, flowables):
+        super().__init__()
+        self._flowables = flowables
+        self._placed = []
+        self._layout_width = None
+
+    def wrap(self, availWidth, availHeight):
+        if availWidth != self._layout_width:
+            self._placed = []
+            y = 0
+            for i, flowable in enumerate(self._flowables):
+                if i:
+                    y += flowable.getSpaceBefore()
+                _, height = flowable.wrap(availWidth, availHeight)
+                y += height
+                self._placed.append((flowable, y))
+                y += flowable.getSpaceAfter()
+            self._layout_width = availWidth
+            self.width, self.height = availWidth, y
+        return self.width, self.height
+
+    def draw(self):
+        canv = self.canv
+        if not canv.hasForm(self.FORM_NAME):
+            canv.beginForm(self.FORM_NAME, 0, 0, self.width, self.height)
+            for flowable, bottom in self._placed:
+                flowable.drawOn(canv, 0, self.height - bottom)
+            canv.endForm()
+        canv.doForm(self.FORM_NAME)
+
+# Bills with at most this many lines are drawn straight onto the canvas by default.
+FAST_PATH_MAX_LINES = 100
+
+class InvoiceTemplate:
+    """The parts of an invoice that never change between bills: styles, table styles and the company header.
+
+    Building these once and reusing them leaves only the order details, product rows and summary
+    to be created per bill.
+
+    Two engines draw the same page: build_platypus() lays the bill out with Platypus flowables,
+    build_canvas() draws it directly at precomputed coordinates, which skips table layout and
+    paragraph parsing. The canvas layout mirrors what Platypus produces for these flowables,
+    including where long bills break onto new pages.
+    """
+
+    PRODUCT_COL_WIDTHS = [40, 240, 50, 80, 80]
+    SUMMARY_COL_WIDTHS = [150, 100]
+    SUMMARY_WRAPPER_COL_WIDTHS = [350, 250]
+
+    # Canvas geometry: SimpleDocTemplate's one-inch margins plus the frame's 6pt padding, and
+    # Table's default cell padding (3pt top/bottom, 6pt left/right) and 12pt leading.
+    MARGIN = inch + 6
+    LINE_HEIGHT = 12
+    CELL_PADDING = 6
+    PRODUCT_HEADER_HEIGHT = 23  # bottom padding 8
+    PRODUCT_ROW_HEIGHT = 18
+    SUMMARY_ROW_HEIGHT = 18
+    SECTION_GAP = 0.3 * inch
+    FOOTER_GAP = 0.5 * inch
+
+    def __init__(self, pagesize=letter):
+        self.pagesize = pagesize
+        styles = getSampleStyleSheet()
+        # Derived styles, so the shared sample stylesheet is never mutated.
+        self.title_style = ParagraphStyle(name='InvoiceTitle', parent=styles['Title'], alignment=1)
+        self.normal_style = ParagraphStyle(name='InvoiceNormal', parent=styles['Normal'], fontSize=10)
+
+        self.header = StaticHeader(
+            [Paragraph(COMPANY_NAME, self.title_style), Spacer(1, 0.1 * inch)]
+            + [Paragraph(line, self.normal_style) for line in COMPANY_DETAILS]
+            + [Spacer(1, 0.2 * inch)]
+        )
+        self.footer = Paragraph("Thank you for your business!", self.normal_style)
+
+        self.product_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ])
+        self.summary_table_style = TableStyle([
+            ('FONTNAME', (0, 0), (-1, -2), 'Helvetica'),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+            ('RIGHTPADDING', (1, 0), (1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+            ('LINEABOVE', (0, -1), (-1, -1), 1, colors.black),
+        ])
+
+    def elements(self, invoice):
+        normal_style = self.normal_style
+        elements = [
+            self.header,
+            Paragraph(f"Order No.: {invoice.order_no}", normal_style),
+            Paragraph(f"Billed To: {invoice.billed_to}", normal_style),
+            Paragraph(f"Date: {invoice.date}", normal_style),
+            Spacer(1, 0.3 * inch),
+        ]
+
+        # Product Table
+        data = [["Sr.No", "Product", "Qty", "Price", "Total"]]
+        for i, (name, qty, price, gst_rate, total) in enumerate(invoice.lines):
+            data.append([str(i + 1), name, str(qty), f"Rs {format_rupees(price)}", f"Rs {format_rupees(total)}"])
+        elements.append(Table(data, colWidths=self.PRODUCT_COL_WIDTHS, style=self.product_table_style))
+        elements.append(Spacer(1, 0.3 * inch))
+
+        # Elegant Summary Table (Compact & Right-Aligned), straight from the cart's running totals
+        summary_data = [[label, f"Rs {format_rupees(paise)}"] for label, paise in summary_rows(invoice.totals)]
+        summary_table = Table(summary_data, colWidths=self.SUMMARY_COL_WIDTHS, style=self.summary_table_style)
+
+        # Wrap in right-aligned layout
+        elements.append(Table([[Spacer(1, 0), summary_table]], colWidths=self.SUMMARY_WRAPPER_COL_WIDTHS))
+        elements.append(Spacer(1, 0.5 * inch))
+        elements.append(self.footer)
+        return elements
+
+    def build(self, invoice, filename, progress=None, engine=None):
+        """Render with engine "canvas" or "platypus"; by default small bills take the canvas path."""
+        if engine is None:
+            engine = "canvas" if len(invoice.lines) <= FAST_PATH_MAX_LINES else "platypus"
+        if engine == "canvas":
+            self.build_canvas(invoice, filename, progress)
+        elif engine == "platypus":
+            self.build_platypus(invoice, filename, progress)
+        else:
+            raise ValueError(f"Unknown invoice engine: {engine}")
+
+    def build_platypus(self, invoice, filename, progress=None):
+        doc = SimpleDocTemplate(filename, pagesize=self.pagesize)
+        if progress is not None:
+            doc.setProgressCallBack(_progress_reporter(progress))
+        doc.build(self.elements(invoice))
+        if progress is not None:
+            progress(100)
+
+    # --- Canvas Fast Path ---
+    def build_canvas(self, invoice, filename, progress=None):
+        page_width, page_height = self.pagesize
+        left, top, bottom = self.MARGIN, page_height - self.MARGIN, self.MARGIN
+        frame_width = page_width - 2 * self.MARGIN
+        c = canvas.Canvas(filename, pagesize=self.pagesize)
+        y = top
+
+        def room(height):
+            nonlocal y
+            # Like a Platypus frame: move to a fresh page when the block does not fit.
+            if y - height < bottom and y < top:
+                c.showPage()
+                y = top
+
+        def text_line(text):
+            nonlocal y
+            room(self.LINE_HEIGHT)
+            c.setFillColor(colors.black)
+            c.setFont("Helvetica", 10)
+            c.drawString(left, y - 10, text)
+            y -= self.LINE_HEIGHT
+
+        def gap(height):
+            nonlocal y
+            room(height)
+            y -= height
+
+        _, header_height = self.header.wrap(frame_width, top - bottom)
+        self.header.drawOn(c, left, top - header_height)
+        y -= header_height
+        text_line(f"Order No.: {invoice.order_no}")
+        text_line(f"Billed To: {invoice.billed_to}")
+        text_line(f"Date: {invoice.date}")
+        gap(self.SECTION_GAP)
+
+        # Product table, split by rows across pages like Platypus does (no repeated header).
+        table_x = left + (frame_width - sum(self.PRODUCT_COL_WIDTHS)) / 2
+        rows = [("Sr.No", "Product", "Qty", "Price", "Total")]
+        rows += [(str(i + 1), name, str(qty), f"Rs {format_rupees(price)}", f"Rs {format_rupees(total)}")
+                 for i, (name, qty, price, gst_rate, total) in enumerate(invoice.lines)]
+        heights = [self.PRODUCT_HEADER_HEIGHT] + [self.PRODUCT_ROW_HEIGHT] * (len(rows) - 1)
+        start = 0
+        while start < len(rows):
+            available = y - bottom
+            end, used = start, 0
+            while end < len(rows) and used + heights[end] <= available:
+                used += heights[end]
+                end += 1
+            if end == start:
+                c.showPage()
+                y = top
+                continue
+            self._draw_product_rows(c, table_x, y, rows[start:end], heights[start:end], start == 0)
+            y -= used
+            start = end
+            if progress is not None:
+                progress(min(99, int(100 * start / len(rows))))
+        gap(self.SECTION_GAP)
+
+        # Summary, right-aligned as the wrapper table places it.
+        summary = summary_rows(invoice.totals)
+        block_height = len(summary) * self.SUMMARY_ROW_HEIGHT + 2 * 3
+        room(block_height)
+        wrapper_x = left + (frame_width - sum(self.SUMMARY_WRAPPER_COL_WIDTHS)) / 2
+        self._draw_summary(c, wrapper_x + self.SUMMARY_WRAPPER_COL_WIDTHS[0] + self.CELL_PADDING,
+                           y - 3, summary)
+        y -= block_height
+        gap(self.FOOTER_GAP)
+        text_line("Thank you for your business!")
+
+        c.showPage()
+        c.save()
+        if progress is not None:
+            progress(100)
+
+    def _draw_product_rows(self, c, x, y, rows, heights, with_header):
+        widths = self.PRODUCT_COL_WIDTHS
+        total_width = sum(widths)
+        bottom = y - sum(heights)
+        if with_header:
+            c.setFillColor(colors.lightgrey)
+            c.rect(x, y - heights[0], total_width, heights[0], stroke=0, fill=1)
+        centres = []
+        edge = x
+        for width in widths:
+            centres.append(edge + width / 2)
+            edge += width
+        # All cells go into one text object; drawCentredString would open one per cell.
+        text = c.beginText()
+        text.setFillColor(colors.black)
+        row_top = y
+        for i, (row, height) in enumerate(zip(rows, heights)):
+            row_bottom = row_top - height
+            header = with_header and i == 0
+            font = "Helvetica-Bold" if header else "Helvetica"
+            text.setFont(font, 10)
+            # Bottom-aligned text: baseline = bottom padding + leading - font size above the row bottom.
+            baseline = row_bottom + (8 if header else 3) + 2
+            for centre, value in zip(centres, row):
+                text.setTextOrigin(centre - stringWidth(value, font, 10) / 2, baseline)
+                text.textOut(value)
+            row_top = row_bottom
+        c.drawText(text)
+
+        c.setStrokeColor(colors.grey)
+        c.setLineWidth(0.5)
+        c.setLineCap(1)  # Table draws its rules with round caps and joins
+        c.setLineJoin(1)
+        # Same rules in the same order as GRID (box, then inner grid), so anti-aliasing matches too.
+        right = x + total_width
+        lines = [(x, y, right, y), (x, bottom, right, bottom), (x, bottom, x, y), (right, bottom, right, y)]
+        row_top = y
+        for height in heights[:-1]:
+            row_top -= height
+            lines.append((x, row_top, right, row_top))
+        edge = x
+        for width in widths[:-1]:
+            edge += width
+            lines.append((edge, bottom, edge, y))
+        for line in lines:
+            c.line(*line)
+
+    def _draw_summary(self, c, x, top, summary):
+        label_width, value_width = self.SUMMARY_COL_WIDTHS
+        row_top = top
+        for i, (label, paise) in enumerate(summary):
+            last = i == len(summary) - 1
+            row_bottom = row_top - self.SUMMARY_ROW_HEIGHT
+            c.setFillColor(colors.black)
+            c.setFont("Helvetica-Bold" if last else "Helvetica", 9)
+            baseline = row_bottom + 3 + self.LINE_HEIGHT - 9
+            c.drawRightString(x + label_width - self.CELL_PADDING, baseline, label)
+            c.drawRightString(x + label_width + value_width - self.CELL_PADDING, baseline, f"Rs {format_rupees(paise)}")
+            if last:
+                c.setStrokeColor(colors.black)
+                c.setLineWidth(1)
+                c.setLineCap(1)
+                c.setLineJoin(1)
+                c.line(x, row_top, x + label_width + value_width, row_top)
+            row_top = row_bottom
+
+_templates = threading.local()
+
+def get_invoice_template():
+    """The calling thread's cached InvoiceTemplate."""
+    template = getattr(_templates, "template", None)
+    if template is None:
+        template = _templates.template = InvoiceTemplate()
+    return template
+
+def build_invoice_pdf(invoice, filename, progress=None, engine=None):
+    get_invoice_template().build(invoice, filename, progress, engine)
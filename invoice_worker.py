@@ -0,0 +1,52 @@
+import logging
+import queue
+import threading
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+# --- Background Invoice Rendering ---
+class InvoiceRenderQueue(QObject):
+    """Renders invoices one after another on a worker thread.
+
+    Jobs are (order_no, snapshot, filename) and the snapshot must be immutable, since the GUI keeps
+    going (and starts the next bill) while the job waits or renders. Signals are emitted from the
+    worker thread; Qt queues them to receivers living on the GUI thread.
+    """
+
+    progress = pyqtSignal(str, int)  # order_no, percent
+    finished = pyqtSignal(str, str)  # order_no, filename
+    failed = pyqtSignal(str, str)  # order_no, error message
+
+    def __init__(self, render, parent=None):
+        super().__init__(parent)
+        self._render = render  # render(snapshot, filename, progress_callback)
+        self._jobs = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="invoice-renderer", daemon=True)
+        self._thread.start()
+
+    def submit(self, order_no, snapshot, filename):
+        self._jobs.put((order_no, snapshot, filename))
+
+    def pending(self):
+        return self._jobs.qsize()
+
+    def shutdown(self, wait=True):
+        """Stop after the jobs already queued; with wait, block until they are written."""
+        self._jobs.put(None)
+        if wait:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            order_no, snapshot, filename = job
+            try:
+                self._render(snapshot, filename, lambda percent: self.progress.emit(order_no, percent))
+            except Exception as e:
+                logging.exception("Rendering invoice %s failed", order_no)
+                self.failed.emit(order_no, str(e))
+            else:
+                logging.info("Invoice %s saved to %s", order_no, filename)
+                self.finished.emit(order_no, filename)
@@ -0,0 +1,38 @@
+import sys
+
+# --- Product ---
+class Product:
+    """One catalogue entry. Treated as immutable: edits replace the object rather than mutate it.
+
+    __slots__ drops the per-instance dict, and material codes are interned so repeated codes
+    (indexes, carts, ledgers) share one string.
+    """
+
+    __slots__ = ("id", "name", "price", "material_code")
+
+    def __init__(self, id, name, price, material_code):
+        self.id = id
+        self.name = name
+        self.price = float(price)
+        self.material_code = sys.intern(material_code or "")
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("id"), data["name"], data["price"], data.get("material_code", ""))
+
+    def to_dict(self):
+        return {"id": self.id, "name": self.name, "price": self.price, "material_code": self.material_code}
+
+    def with_id(self, product_id):
+        return Product(product_id, self.name, self.price, self.material_code)
+
+    def __eq__(self, other):
+        if not isinstance(other, Product):
+            return NotImplemented
+        return (self.id, self.name, self.price, self.material_code) == \
+            (other.id, other.name, other.price, other.material_code)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Product(id={self.id!r}, name={self.name!r}, price={self.price!r}, material_code={self.material_code!r})"
@@ -0,0 +1,210 @@
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+
+# --- Scoring ---
+EXACT_CODE = 100
+CODE_PREFIX = 80
+NAME_PREFIX = 60
+WORD_PREFIX = 40
+FUZZY = 20
+
+MAX_NAME_CANDIDATES = 500  # cap on name matches ranked per query, keeps one-letter queries cheap
+MIN_TRIGRAM_OVERLAP = 0.5
+
+def normalize(text):
+    return " ".join(text.casefold().split())
+
+def looks_like_code(text):
+    """True for a single token with a digit in it: what a scanner types, not a product name."""
+    text = text.strip()
+    return bool(text) and len(text.split()) == 1 and any(c.isdigit() for c in text)
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _prefix_range(keys, prefix):
+    """Keys of a sorted list that start with prefix, in order."""
+    i = bisect_left(keys, prefix)
+    while i < len(keys) and keys[i].startswith(prefix):
+        yield keys[i]
+        i += 1
+
+# --- Product Index ---
+class ProductIndex:
+    """In-memory lookup over products: O(1) material-code hits for scanners, prefix and trigram name search.
+
+    Names are indexed by word: each distinct word maps to the products containing it, and trigrams
+    are kept per distinct word, so the fuzzy index grows with the vocabulary rather than the catalogue.
+    Products are keyed by id so the index can follow inventory change events without positions.
+    Material codes are matched exactly as stored (the stores treat "ab1" and "AB1" as different
+    codes); only the code-prefix suggestions for typed text ignore case.
+    """
+
+    def __init__(self, products=()):
+        self.rebuild(products)
+
+    def rebuild(self, products):
+        self._by_id = {}
+        self._names = {}
+        self._by_code = {}
+        self._codes = []  # sorted code keys, see _code_key
+        self._word_ids = defaultdict(set)
+        self._word_trigrams = defaultdict(set)
+        for product in products:
+            self._index(product)
+        self._codes.sort()
+        self._vocab = sorted(self._word_ids)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    @staticmethod
+    def _code_key(code):
+        # "ab1\0AB1": prefix search runs on the casefolded part ("\0" sorts first, so the order
+        # is that of the folded codes), and the exact code after it finds the product.
+        return f"{code.casefold()}\0{code}"
+
+    def _keys(self, product):
+        name = normalize(product.name)
+        return name, product.material_code, set(name.split())
+
+    def _index(self, product, keep_sorted=False):
+        product_id = product.id
+        name, code, words = self._keys(product)
+        self._by_id[product_id] = product
+        self._names[product_id] = name
+        if code:
+            self._by_code[code] = product_id
+            if keep_sorted:
+                insort(self._codes, self._code_key(code))
+            else:
+                self._codes.append(self._code_key(code))
+        for word in words:
+            ids = self._word_ids[word]
+            if not ids:
+                for gram in trigrams(word):
+                    self._word_trigrams[gram].add(word)
+                if keep_sorted:
+                    insort(self._vocab, word)
+            ids.add(product_id)
+
+    def _unindex(self, product):
+        product_id = product.id
+        name, code, words = self._keys(product)
+        self._by_id.pop(product_id, None)
+        self._names.pop(product_id, None)
+        if code:
+            if self._by_code.get(code) == product_id:
+                del self._by_code[code]
+            self._remove_key(self._codes, self._code_key(code))
+        for word in words:
+            ids = self._word_ids.get(word)
+            if ids is None:
+                continue
+            ids.discard(product_id)
+            if not ids:
+                del self._word_ids[word]
+                self._remove_key(self._vocab, word)
+                for gram in trigrams(word):
+                    self._word_trigrams[gram].discard(word)
+
+    @staticmethod
+    def _remove_key(keys, key):
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+
+    def add(self, product):
+        self._index(product, keep_sorted=True)
+
+    def update(self, product):
+        self.remove(product)
+        self._index(product, keep_sorted=True)
+
+    def remove(self, product):
+        old = self._by_id.get(product.id)
+        if old is not None:
+            self._unindex(old)
+
+    def get(self, product_id):
+        return self._by_id.get(product_id)
+
+    def by_code(self, material_code):
+        product_id = self._by_code.get(material_code.strip())
+        return self._by_id.get(product_id) if product_id is not None else None
+
+    def _token_groups(self, token, fuzzy):
+        """(product ids, match quality) groups for one query word: 1.0 per prefixed word, trigram overlap otherwise."""
+        groups = [(self._word_ids[word], 1.0) for word in _prefix_range(self._vocab, token)]
+        if fuzzy and len(token) >= 3:
+            grams = trigrams(token)
+            hits = Counter()
+            for gram in grams:
+                hits.update(self._word_trigrams.get(gram, ()))
+            for word, count in hits.items():
+                overlap = count / max(len(grams), len(word) + 1)  # a padded word has len + 1 trigrams
+                if overlap >= MIN_TRIGRAM_OVERLAP and not word.startswith(token):
+                    groups.append((self._word_ids[word], overlap))
+            groups.sort(key=lambda group: -group[1])
+        return groups
+
+    def _name_matches(self, query, fuzzy):
+        """Product id -> mean match quality for products whose name matches every query word.
+
+        Candidates are drawn from the most selective word and checked against the others by set
+        membership, so a common word never forces a scan of everything it matches.
+        """
+        token_groups = [self._token_groups(token, fuzzy) for token in query.split()]
+        if not all(token_groups):
+            return {}
+        token_groups.sort(key=lambda groups: sum(len(ids) for ids, _ in groups))
+        driver, others = token_groups[0], token_groups[1:]
+        matches = {}
+        for ids, quality in driver:
+            for product_id in ids:
+                if product_id in matches:
+                    continue
+                total = quality
+                for groups in others:
+                    best = next((q for other_ids, q in groups if product_id in other_ids), None)
+                    if best is None:
+                        break
+                    total += best
+                else:
+                    matches[product_id] = total / len(token_groups)
+                    if len(matches) >= MAX_NAME_CANDIDATES:
+                        return matches
+        return matches
+
+    def search(self, query, limit=20):
+        """Ranked matches for a code or (partial) name: exact code, code prefix, name prefix, word prefixes, trigrams."""
+        exact = self._by_code.get(query.strip())
+        query = normalize(query)
+        if not query:
+            return []
+        scores = {}
+
+        def score(product_id, value):
+            if value > scores.get(product_id, 0):
+                scores[product_id] = value
+
+        if exact is not None:
+            score(exact, EXACT_CODE)
+        for i, key in enumerate(_prefix_range(self._codes, query)):
+            if i >= limit:
+                break
+            product_id = self._by_code.get(key.partition("\0")[2])
+            if product_id is not None:
+                score(product_id, CODE_PREFIX)
+
+        for product_id in self._name_matches(query, fuzzy=False):
+            score(product_id, NAME_PREFIX if self._names[product_id].startswith(query) else WORD_PREFIX)
+
+        # Fuzzy fallback for typos, only when the exact paths came up short.
+        if exact is None and len(scores) < limit:
+            for product_id, quality in self._name_matches(query, fuzzy=True).items():
+                score(product_id, FUZZY * quality)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], len(self._names[item[0]])))
+        return [self._by_id[product_id] for product_id, _ in ranked[:limit]]
@@ -0,0 +1,138 @@
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import namedtuple
+from decimal import Decimal
+
+from cart import format_rate, format_rupees
+
+try:
+    import numpy as np
+except ImportError:  # reports still work, just without the vectorised grouping
+    np = None
+
+# --- Sales Reports ---
+# Built from the rollups InvoiceLedger.record() keeps per day and per month, never from the bills
+# themselves: a year is at most a few hundred sales rows plus one row per product per month.
+# Money stays in paise until a report is displayed or exported.
+
+Report = namedtuple("Report", ["title", "headers", "rows", "money_columns"])
+
+REPORTS = {}  # name -> (label, function(ledger, day_from, day_to))
+
+def report(name, label):
+    def register(func):
+        REPORTS[name] = (label, func)
+        return func
+    return register
+
+def group_sum(rows):
+    """{key: [sums]} for rows of (key, *values).
+
+    Integer keys (rollup product ids) are grouped with NumPy when it is installed: a year of
+    product rollups can be a hundred thousand rows, while the other reports only have a few hundred.
+    """
+    if not rows:
+        return {}
+    if np is not None and isinstance(rows[0][0], int):
+        array = np.array(rows, dtype=np.int64)
+        array = array[np.argsort(array[:, 0], kind="stable")]
+        starts = np.flatnonzero(np.r_[True, array[1:, 0] != array[:-1, 0]])
+        sums = np.add.reduceat(array[:, 1:], starts, axis=0)
+        return dict(zip(array[starts, 0].tolist(), sums.tolist()))
+    sums = {}
+    for key, *values in rows:
+        total = sums.get(key)
+        if total is None:
+            sums[key] = values
+        else:
+            for i, value in enumerate(values):
+                total[i] += value
+    return sums
+
+# --- Reports ---
+@report("daily", "Daily sales")
+def daily_sales(ledger, day_from=None, day_to=None):
+    rows = sorted(ledger.rollups("sales_rollup", day_from, day_to, by_day=True))
+    return Report("Daily sales", ["Day", "Invoices", "Net", "Freight", "GST", "Gross"], rows, {2, 3, 4, 5})
+
+@report("monthly", "Monthly sales")
+def monthly_sales(ledger, day_from=None, day_to=None):
+    # Partial months at either end arrive as day rows and are folded into their month here.
+    sums = group_sum([(period[:7], *values) for period, *values in ledger.rollups("sales_rollup", day_from, day_to)])
+    return Report("Monthly sales", ["Month", "Invoices", "Net", "Freight", "GST", "Gross"],
+                  sorted((month, *values) for month, values in sums.items()), {2, 3, 4, 5})
+
+@report("gst", "GST by slab")
+def gst_by_slab(ledger, day_from=None, day_to=None):
+    sums = group_sum([row[1:] for row in ledger.rollups("gst_rollup", day_from, day_to)])
+    return Report("GST by slab", ["GST %", "Taxable", "Freight", "GST"],
+                  [(format_rate(rate), *sums[rate]) for rate in sorted(sums, key=Decimal)], {1, 2, 3})
+
+@report("products", "Top products by quantity")
+def top_products(ledger, day_from=None, day_to=None, limit=50):
+    sums = group_sum([row[1:] for row in ledger.rollups("product_rollup", day_from, day_to)])
+    ranked = sorted(sums.items(), key=lambda item: (-item[1][0], item[0]))[:limit]
+    names = ledger.product_names(product for product, _ in ranked)
+    return Report("Top products by quantity", ["Material Code", "Product", "Qty", "Net", "Total"],
+                  [names[product] + tuple(values) for product, values in ranked], {3, 4})
+
+def run_report(ledger, name, day_from=None, day_to=None):
+    return REPORTS[name][1](ledger, day_from, day_to)
+
+# --- Output ---
+def display_rows(report):
+    """Rows as strings, with paise shown as rupees."""
+    return [[format_rupees(value) if column in report.money_columns else str(value)
+             for column, value in enumerate(row)] for row in report.rows]
+
+def export_csv(report, path):
+    """Write the report to a CSV file; returns how many rows were written."""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(report.headers)
+        writer.writerows(display_rows(report))
+    os.replace(temp_path, path)
+    return len(report.rows)
+
+# --- Entry Point ---
+def main(argv=None):
+    from invoice_ledger import InvoiceLedger
+
+    parser = argparse.ArgumentParser(description="Sales and GST reports from the invoice ledger.")
+    parser.add_argument("report", choices=sorted(REPORTS) + ["rebuild"],
+                        help="report to print, or 'rebuild' to recompute the rollups from the bills")
+    parser.add_argument("--db", default="invoices.db", help="ledger database (default: %(default)s)")
+    parser.add_argument("--from", dest="day_from", help="first day, YYYY-MM-DD")
+    parser.add_argument("--to", dest="day_to", help="last day, YYYY-MM-DD")
+    parser.add_argument("--csv", help="write the report to this CSV file instead of printing it")
+    args = parser.parse_args(argv)
+
+    ledger = InvoiceLedger(args.db)
+    started = time.perf_counter()
+    try:
+        if args.report == "rebuild":
+            ledger.rebuild_rollups()
+            print(f"Rebuilt the rollups in {time.perf_counter() - started:.2f}s")
+            return 0
+        result = run_report(ledger, args.report, args.day_from, args.day_to)
+        elapsed = (time.perf_counter() - started) * 1000
+        if args.csv:
+            export_csv(result, args.csv)
+            print(f"Wrote {len(result.rows)} rows to {args.csv} in {elapsed:.1f} ms")
+            return 0
+        rows = display_rows(result)
+        widths = [max([len(header)] + [len(row[i]) for row in rows]) for i, header in enumerate(result.headers)]
+        print("  ".join(header.ljust(width) for header, width in zip(result.headers, widths)))
+        for row in rows:
+            print("  ".join(value.ljust(width) for value, width in zip(row, widths)))
+        print(f"{result.title}: {len(rows)} rows in {elapsed:.1f} ms")
+    finally:
+        ledger.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())